@@ -4,41 +4,87 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from flask import Flask
 from flask_cors import CORS
+from config import Config
 from routes.auth_routes import auth_bp
 from routes.profile_routes import profile_bp
 from routes.course_routes import course_bp
 from routes.lesson_routes import lesson_bp
 from routes.enrollment_routes import enrollment_bp
+from routes.admin_routes import admin_bp
+from utils.json_provider import BSONJSONProvider
+from utils.compression import compress_response
+from utils.query_stats import init_query_stats
+from utils.metrics import init_metrics
+from utils.profiling import init_profiling
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = Flask(__name__)
+def create_app():
+    """Application factory: build and configure a Flask app
 
-# ✅ FIXED CORS CONFIG (critical changes only)
-cors_origins = os.getenv(
-    'CORS_ORIGINS',
-    'https://learnsphere01.netlify.app,http://localhost:3000'
-).split(',')
+    Creating the app does not connect to MongoDB unless ENSURE_INDEXES is on;
+    each process opens its own client on first use (see utils/database.py).
+    """
+    app = Flask(__name__)
+    
+    # Per-route request counts and latency on /metrics (registered first
+    # so the timing covers the other request hooks)
+    init_metrics(app)
+    
+    # cProfile/stack-sampler captures on demand (see utils/profiling.py)
+    init_profiling(app)
+    
+    # Serialize ObjectId/datetime natively and compress large responses
+    app.json = BSONJSONProvider(app)
+    app.after_request(compress_response)
+    
+    # Count Mongo commands per request (Server-Timing header, N+1 warnings)
+    init_query_stats(app)
+    
+    # ✅ FIXED CORS CONFIG (critical changes only)
+    cors_origins = os.getenv(
+        'CORS_ORIGINS',
+        'https://learnsphere01.netlify.app,http://localhost:3000'
+    ).split(',')
+    
+    CORS(
+        app,
+        origins=cors_origins,
+        supports_credentials=True,
+        allow_headers=["Content-Type", "Authorization"],
+        methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+    )
+    
+    # Register blueprints
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(profile_bp)
+    app.register_blueprint(course_bp)
+    app.register_blueprint(lesson_bp)
+    app.register_blueprint(enrollment_bp)
+    app.register_blueprint(admin_bp)
+    
+    # Create indexes and fill in missing enrollment and lesson counts (all
+    # idempotent); the API still starts if the database is unreachable
+    if Config.ENSURE_INDEXES:
+        from utils.indexes import ensure_indexes
+        from utils.catalog import fill_missing_enrollment_counts
+        from utils.lesson_counts import fill_missing_lesson_counts
+        try:
+            ensure_indexes()
+            fill_missing_enrollment_counts()
+            fill_missing_lesson_counts()
+        except Exception as e:
+            app.logger.warning(f'Could not ensure indexes: {e}')
+    
+    @app.route('/')
+    def health_check():
+        return {'message': 'LMS API is running', 'status': 'ok'}
+    
+    return app
 
-CORS(
-    app,
-    origins=cors_origins,
-    supports_credentials=True,
-    allow_headers=["Content-Type", "Authorization"],
-    methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"]
-)
-
-# Register blueprints
-app.register_blueprint(auth_bp)
-app.register_blueprint(profile_bp)
-app.register_blueprint(course_bp)
-app.register_blueprint(lesson_bp)
-app.register_blueprint(enrollment_bp)
-
-@app.route('/')
-def health_check():
-    return {'message': 'LMS API is running', 'status': 'ok'}
+# Module-level app for `gunicorn app:app`, `python app.py` and existing imports
+app = create_app()
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
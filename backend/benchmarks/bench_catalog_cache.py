@@ -0,0 +1,54 @@
+"""
+Benchmark for the catalog cache
+Seeds a catalog into a scratch database and compares latency and Mongo
+query counts of GET /api/courses and GET /api/courses/<id> with a cold
+cache (cleared before every request) and a warm one.
+
+Usage: python benchmarks/bench_catalog_cache.py [num_courses]
+Runs against MONGO_URI; DATABASE_NAME defaults to 'lms_bench' and is dropped first.
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import counter
+from benchmarks.bench_course_list import seed
+from app import app
+from utils.catalog_cache import catalog_cache, lesson_cache
+from utils.database import courses_collection
+
+REQUESTS = 200
+
+def measure(client, path, headers, cold):
+    """Return (p50 ms, queries per request) over REQUESTS requests"""
+    timings = []
+    counter.count = 0
+    for _ in range(REQUESTS):
+        if cold:
+            catalog_cache.clear()
+            lesson_cache.clear()
+        start = time.perf_counter()
+        response = client.get(path, headers=headers)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.get_json()
+    timings.sort()
+    return timings[len(timings) // 2], counter.count / REQUESTS
+
+def run(num_courses):
+    token = seed(num_courses)
+    course_id = str(courses_collection.find_one({}, {'_id': 1})['_id'])
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    print(f"{num_courses} courses, {REQUESTS} requests each")
+    print(f"{'path':>28} {'cache':>6} {'p50 ms':>8} {'queries':>8}")
+    for path in ('/api/courses?limit=50', f'/api/courses/{course_id}'):
+        for cold in (True, False):
+            p50, queries = measure(client, path, headers, cold)
+            label = path if len(path) <= 28 else '/api/courses/<id>'
+            print(f"{label:>28} {'cold' if cold else 'warm':>6} {p50:>8.2f} {queries:>8.2f}")
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
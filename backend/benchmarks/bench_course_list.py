@@ -0,0 +1,81 @@
+"""
+Benchmark for GET /api/courses
+Seeds catalogs of increasing size into a scratch database and reports how many
+Mongo commands a single catalog load issues. The count should stay constant.
+
+Usage: python benchmarks/bench_course_list.py [sizes...]
+Runs against MONGO_URI; DATABASE_NAME defaults to 'lms_bench' and is dropped between runs.
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import counter, drop_collections
+
+from datetime import datetime
+from app import app
+from utils.auth import generate_token
+from utils.database import users_collection, courses_collection, lessons_collection
+
+LESSONS_PER_COURSE = 5
+
+def seed(num_courses):
+    """Insert an instructor and num_courses courses with lessons"""
+    drop_collections('users', 'courses', 'lessons')
+
+    now = datetime.utcnow()
+    user_id = str(users_collection.insert_one({
+        'email': 'bench@lms.com',
+        'password': '',
+        'role': 'Instructor',
+        'created_at': now,
+        'updated_at': now
+    }).inserted_id)
+
+    courses = [{
+        'title': f'Course {i}',
+        'description': '',
+        'instructor_id': user_id,
+        'category': 'Benchmark',
+        'price': 0,
+        'duration': 0,
+        'level': 'Beginner',
+        'is_published': True,
+        'created_at': now,
+        'updated_at': now
+    } for i in range(num_courses)]
+    course_ids = courses_collection.insert_many(courses).inserted_ids
+
+    lessons = [{
+        'course_id': str(course_id),
+        'title': f'Lesson {order}',
+        'content': '',
+        'lesson_type': 'text',
+        'video_url': '',
+        'order': order,
+        'duration': 0,
+        'created_at': now,
+        'updated_at': now
+    } for course_id in course_ids for order in range(LESSONS_PER_COURSE)]
+    lessons_collection.insert_many(lessons)
+
+    return generate_token(user_id, 'Instructor')
+
+def run(sizes):
+    client = app.test_client()
+    print(f"{'courses':>10} {'queries':>10} {'ms':>10}")
+
+    for size in sizes:
+        token = seed(size)
+        counter.count = 0
+        start = time.perf_counter()
+        response = client.get('/api/courses', headers={'Authorization': f'Bearer {token}'})
+        elapsed = (time.perf_counter() - start) * 1000
+        assert response.status_code == 200, response.get_json()
+        print(f"{size:>10} {counter.count:>10} {elapsed:>10.1f}")
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 5000]
+    run(sizes)
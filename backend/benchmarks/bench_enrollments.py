@@ -0,0 +1,77 @@
+"""
+Benchmark for GET /api/enrollments
+Seeds one instructor course with increasing numbers of enrolled students and
+checks that the query count per request does not depend on the result size.
+
+Usage: python benchmarks/bench_enrollments.py [sizes...]
+Runs against MONGO_URI; DATABASE_NAME defaults to 'lms_bench' and is dropped between runs.
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import counter, drop_collections
+
+from datetime import datetime
+from app import app
+from utils.auth import generate_token
+from utils.database import users_collection, courses_collection, enrollments_collection
+
+NUM_COURSES = 20
+
+def seed(num_enrollments):
+    """Insert an instructor, NUM_COURSES courses and num_enrollments enrollments"""
+    drop_collections('users', 'courses', 'enrollments')
+
+    now = datetime.utcnow()
+    user_id = str(users_collection.insert_one({
+        'email': 'bench@lms.com',
+        'password': '',
+        'role': 'Instructor',
+        'created_at': now,
+        'updated_at': now
+    }).inserted_id)
+
+    course_ids = courses_collection.insert_many([{
+        'title': f'Course {i}',
+        'instructor_id': user_id,
+        'is_published': True,
+        'created_at': now,
+        'updated_at': now
+    } for i in range(NUM_COURSES)]).inserted_ids
+
+    if num_enrollments:
+        enrollments_collection.insert_many([{
+            'student_id': f'student-{i}',
+            'course_id': str(course_ids[i % NUM_COURSES]),
+            'progress': 0,
+            'completed_lessons': [],
+            'enrolled_at': now,
+            'updated_at': now
+        } for i in range(num_enrollments)])
+
+    return generate_token(user_id, 'Instructor')
+
+def run(sizes):
+    client = app.test_client()
+    print(f"{'enrollments':>12} {'queries':>10} {'ms':>10}")
+
+    counts = set()
+    for size in sizes:
+        token = seed(size)
+        counter.count = 0
+        start = time.perf_counter()
+        response = client.get('/api/enrollments', headers={'Authorization': f'Bearer {token}'})
+        elapsed = (time.perf_counter() - start) * 1000
+        assert response.status_code == 200, response.get_json()
+        counts.add(counter.count)
+        print(f"{size:>12} {counter.count:>10} {elapsed:>10.1f}")
+
+    # Every size must issue the same number of queries
+    assert len(counts) == 1, f'Query count grows with result size: {sorted(counts)}'
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 20000]
+    run(sizes)
@@ -0,0 +1,91 @@
+"""
+Microbenchmark for JSON encoding of course documents
+Compares the previous approach (str() loop over _id + Flask's default
+encoder) with BSONJSONProvider, using orjson when installed and the
+standard library fallback otherwise. Does not need a database.
+
+Usage: python benchmarks/bench_json.py [num_courses]
+"""
+
+import sys
+import os
+import time
+import gzip
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from bson import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from utils import json_provider
+from utils.json_provider import BSONJSONProvider
+
+REPEAT = 5
+
+def make_courses(num_courses):
+    now = datetime.utcnow()
+    return [{
+        '_id': ObjectId(),
+        'title': f'Course {i}',
+        'description': 'A realistic course description of moderate length. ' * 4,
+        'instructor_id': str(ObjectId()),
+        'category': 'Programming',
+        'price': 49.99,
+        'duration': 12,
+        'level': 'Beginner',
+        'is_published': True,
+        'lesson_count': 10,
+        'created_at': now,
+        'updated_at': now
+    } for i in range(num_courses)]
+
+def best_of(fn):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def run(num_courses):
+    app = Flask(__name__)
+    default_provider = DefaultJSONProvider(app)
+    bson_provider = BSONJSONProvider(app)
+    orjson_module = json_provider.orjson
+
+    def baseline():
+        courses = make_courses(num_courses)
+        for course in courses:
+            course['_id'] = str(course['_id'])
+        return default_provider.dumps({'courses': courses})
+
+    def bson_stdlib():
+        json_provider.orjson = None
+        try:
+            return bson_provider.dumps({'courses': make_courses(num_courses)})
+        finally:
+            json_provider.orjson = orjson_module
+
+    def bson_fast():
+        return bson_provider.dumps({'courses': make_courses(num_courses)})
+
+    generation, _ = best_of(lambda: make_courses(num_courses))
+    print(f"{num_courses} courses, best of {REPEAT}, document generation ({generation * 1000:.1f} ms) subtracted")
+    print(f"{'encoder':>28} {'ms':>10} {'docs/s':>12}")
+
+    cases = [('str() loop + default', baseline), ('BSONJSONProvider (stdlib)', bson_stdlib)]
+    if orjson_module is not None:
+        cases.append(('BSONJSONProvider (orjson)', bson_fast))
+
+    body = None
+    for name, fn in cases:
+        elapsed, body = best_of(fn)
+        elapsed = max(elapsed - generation, 1e-9)
+        print(f"{name:>28} {elapsed * 1000:>10.1f} {num_courses / elapsed:>12.0f}")
+
+    raw = body.encode('utf-8')
+    elapsed, compressed = best_of(lambda: gzip.compress(raw, compresslevel=6))
+    print(f"gzip level 6: {len(raw)} -> {len(compressed)} bytes in {elapsed * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
@@ -0,0 +1,57 @@
+"""
+Benchmark for POST /api/auth/login
+Runs concurrent logins against the in-process app at several hashing pool
+sizes and reports throughput and how many requests were rejected with 503.
+
+Usage: python benchmarks/bench_login.py [pool sizes...]
+Runs against MONGO_URI; DATABASE_NAME defaults to 'lms_bench' and is dropped before the run.
+"""
+
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import drop_collections  # selects the benchmark database
+
+from concurrent.futures import ThreadPoolExecutor
+from app import app
+from config import Config
+from models.user import User
+from utils.auth import shutdown_hash_pool
+
+CONCURRENCY = 32
+LOGINS = 256
+EMAIL = 'bench@lms.com'
+PASSWORD = 'bench-password'
+
+def login(client):
+    response = client.post('/api/auth/login', json={'email': EMAIL, 'password': PASSWORD})
+    return response.status_code
+
+def run(pool_sizes):
+    drop_collections('users')
+    User.create_user(EMAIL, PASSWORD, 'Student')
+
+    client = app.test_client()
+    print(f"bcrypt rounds={Config.BCRYPT_ROUNDS} concurrency={CONCURRENCY} logins={LOGINS}")
+    print(f"{'pool':>6} {'logins/s':>10} {'ok':>6} {'503':>6}")
+
+    for size in pool_sizes:
+        shutdown_hash_pool()
+        Config.HASH_POOL_SIZE = size
+        # Warm the pool so process start-up is not measured
+        login(client)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
+            statuses = list(executor.map(lambda _: login(client), range(LOGINS)))
+        elapsed = time.perf_counter() - start
+
+        print(f"{size:>6} {LOGINS / elapsed:>10.1f} {statuses.count(200):>6} {statuses.count(503):>6}")
+
+    shutdown_hash_pool()
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [0, 1, 2, 4, os.cpu_count() or 8]
+    run(sizes)
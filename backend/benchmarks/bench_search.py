@@ -0,0 +1,93 @@
+"""
+Benchmark for GET /api/courses/search
+Seeds a catalog into a scratch database, creates the indexes and reports
+latency percentiles for ranked text search and prefix autocomplete.
+
+Usage: python benchmarks/bench_search.py [num_courses]
+Runs against MONGO_URI; DATABASE_NAME defaults to 'lms_bench' and is dropped first.
+"""
+
+import sys
+import os
+import time
+import random
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import drop_collections  # selects the benchmark database
+
+from datetime import datetime
+from app import app
+from utils.auth import generate_token
+from utils.database import users_collection, courses_collection
+from utils.indexes import ensure_indexes
+from utils.search import get_search_terms
+
+WORDS = ['python', 'javascript', 'react', 'data', 'science', 'machine', 'learning', 'design',
+         'web', 'mobile', 'cloud', 'security', 'database', 'marketing', 'finance', 'music']
+CATEGORIES = ['Programming', 'Design', 'Business', 'Music', 'Data']
+TEXT_QUERIES = ['python', 'machine learning', 'web design', 'cloud security']
+PREFIX_QUERIES = ['py', 'mach', 'web d', 'sec', 'ja']
+REQUESTS_PER_QUERY = 20
+BATCH_SIZE = 10000
+
+def seed(num_courses):
+    """Insert num_courses courses with generated titles and search terms"""
+    drop_collections('users', 'courses')
+    ensure_indexes()
+
+    now = datetime.utcnow()
+    user_id = str(users_collection.insert_one({
+        'email': 'bench@lms.com',
+        'password': '',
+        'role': 'Student',
+        'created_at': now,
+        'updated_at': now
+    }).inserted_id)
+
+    rng = random.Random(42)
+    for start in range(0, num_courses, BATCH_SIZE):
+        courses = []
+        for i in range(start, min(start + BATCH_SIZE, num_courses)):
+            course = {
+                'title': ' '.join(rng.sample(WORDS, 3)).title() + f' {i}',
+                'description': ' '.join(rng.choices(WORDS, k=20)),
+                'instructor_id': 'bench',
+                'category': rng.choice(CATEGORIES),
+                'price': 0,
+                'duration': 0,
+                'level': 'Beginner',
+                'is_published': True,
+                'created_at': now,
+                'updated_at': now
+            }
+            course['search_terms'] = get_search_terms(course)
+            courses.append(course)
+        courses_collection.insert_many(courses)
+
+    return generate_token(user_id, 'Student')
+
+def percentile(timings, fraction):
+    return timings[min(int(len(timings) * fraction), len(timings) - 1)]
+
+def run(num_courses):
+    token = seed(num_courses)
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    print(f"{num_courses} courses, {REQUESTS_PER_QUERY} requests per query")
+    print(f"{'mode':>8} {'query':>18} {'results':>8} {'p50 ms':>8} {'p95 ms':>8}")
+
+    for mode, queries in (('text', TEXT_QUERIES), ('prefix', PREFIX_QUERIES)):
+        for text in queries:
+            timings = []
+            for _ in range(REQUESTS_PER_QUERY):
+                start = time.perf_counter()
+                response = client.get('/api/courses/search', query_string={'q': text, 'mode': mode}, headers=headers)
+                timings.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.get_json()
+            timings.sort()
+            results = len(response.get_json()['courses'])
+            print(f"{mode:>8} {text:>18} {results:>8} {percentile(timings, 0.5):>8.1f} {percentile(timings, 0.95):>8.1f}")
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,57 @@
+"""
+Shared helpers for the benchmark scripts
+Import this module before anything from utils.database so the command
+listener is registered before the MongoClient is created. It selects the
+'lms_bench' database unless DATABASE_NAME is set, and the scripts refuse to
+drop collections in any database whose name does not end in '_bench'.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('DATABASE_NAME', 'lms_bench')
+
+from pymongo import monitoring
+from config import Config
+
+# The benchmarks drop collections; MONGO_URI defaults to the production
+# cluster, so they only do so in databases whose name says they are scratch
+BENCH_DATABASE_SUFFIX = '_bench'
+
+# getMore is excluded: it follows result size, not the number of queries issued
+READ_COMMANDS = ('find', 'aggregate', 'count')
+
+# Every command a route can issue, reads and writes
+DATABASE_COMMANDS = READ_COMMANDS + ('distinct', 'insert', 'update', 'delete', 'findAndModify')
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts queries sent to the server"""
+    def __init__(self, commands=READ_COMMANDS):
+        self.commands = commands
+        self.count = 0
+
+    def started(self, event):
+        if event.command_name in self.commands:
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+counter = CommandCounter()
+monitoring.register(counter)
+
+def drop_collections(*names):
+    """Drop collections of the benchmark database, refusing any other database"""
+    if not Config.DATABASE_NAME.endswith(BENCH_DATABASE_SUFFIX):
+        raise SystemExit(
+            f"Refusing to drop collections in '{Config.DATABASE_NAME}': "
+            f"set DATABASE_NAME to a name ending in '{BENCH_DATABASE_SUFFIX}'"
+        )
+
+    from utils.database import db
+    for name in names:
+        db.drop_collection(name)
@@ -0,0 +1,237 @@
+"""
+Deterministic synthetic data generator for load testing
+Bulk-inserts users (most with profiles), courses, lessons and enrollments
+with production-like skew: a few instructors own most courses, a few
+courses attract most enrollments, and lesson counts, prices and content
+lengths are long-tailed. The same arguments and seed always produce the
+same documents, including their ObjectIds.
+
+Usage: python benchmarks/datagen.py [--users N] [--courses N] [--lessons-per-course N]
+                                    [--enrollments-per-student N] [--seed N]
+Runs against MONGO_URI; DATABASE_NAME defaults to 'lms_bench' and is dropped first.
+Every generated user has the password in PASSWORD.
+"""
+
+import sys
+import os
+import math
+import random
+import argparse
+import itertools
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import drop_collections  # selects the benchmark database
+
+from datetime import datetime, timedelta
+from bson import ObjectId
+from utils.auth import hash_password
+from utils.database import db
+from utils.indexes import ensure_indexes
+from utils.search import get_search_terms
+from utils.course_stats import reconcile_course_stats
+
+PASSWORD = 'password123'
+START_TIME = datetime(2024, 1, 1)
+TIME_SPAN = timedelta(days=365)
+BATCH_SIZE = 5000
+
+CATEGORIES = [('Programming', 30), ('Web Development', 20), ('Data Science', 15), ('Design', 10),
+              ('Business', 10), ('Marketing', 7), ('Music', 5), ('Languages', 3)]
+LEVELS = [('Beginner', 50), ('Intermediate', 35), ('Advanced', 15)]
+WORDS = ['python', 'javascript', 'react', 'data', 'analysis', 'machine', 'learning', 'design',
+         'web', 'mobile', 'cloud', 'security', 'database', 'marketing', 'finance', 'music',
+         'fundamentals', 'advanced', 'practical', 'complete', 'modern', 'guide', 'projects']
+FIRST_NAMES = ['Amal', 'Nimal', 'Sara', 'John', 'Priya', 'Chen', 'Maria', 'Omar', 'Ana', 'Kofi']
+LAST_NAMES = ['Perera', 'Silva', 'Smith', 'Kumar', 'Wang', 'Garcia', 'Hassan', 'Mensah']
+
+def zipf_cum_weights(n, exponent=1.1):
+    """Cumulative weights giving rank r a probability proportional to 1 / r^exponent"""
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, n + 1)))
+
+def weighted(rng, pairs):
+    values, weights = zip(*pairs)
+    return rng.choices(values, weights=weights)[0]
+
+def long_tail(rng, mean, sigma=0.6, minimum=1):
+    """Log-normal integer with the given mean"""
+    return max(minimum, round(rng.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)))
+
+class Generator:
+    """Builds and bulk-inserts one synthetic dataset"""
+
+    def __init__(self, seed, batch_size=BATCH_SIZE):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.sequence = itertools.count()
+        self.pending = {}
+        self.inserted = {}
+
+    def make_id(self, created_at):
+        """ObjectId whose timestamp is created_at, made unique by a counter instead of randomness"""
+        timestamp = int((created_at - datetime(1970, 1, 1)).total_seconds())
+        return ObjectId(f'{timestamp:08x}{next(self.sequence):016x}')
+
+    def random_time(self, after=START_TIME):
+        return after + (START_TIME + TIME_SPAN - after) * self.rng.random()
+
+    def insert(self, collection_name, document):
+        """Queue a document, inserting the queue once it reaches batch_size"""
+        batch = self.pending.setdefault(collection_name, [])
+        batch.append(document)
+        if len(batch) >= self.batch_size:
+            self.flush(collection_name)
+
+    def flush(self, collection_name=None):
+        for name in ([collection_name] if collection_name else list(self.pending)):
+            batch = self.pending.pop(name, [])
+            if batch:
+                db[name].insert_many(batch, ordered=False)
+                self.inserted[name] = self.inserted.get(name, 0) + len(batch)
+
+    def users(self, num_users, password_hash):
+        """Generate users and profiles; return (instructors, students) as (id, created_at) pairs"""
+        num_admins = max(1, num_users // 200)
+        num_instructors = max(1, num_users // 20)
+        instructors, students = [], []
+        for i in range(num_users):
+            role = 'Admin' if i < num_admins else 'Instructor' if i < num_admins + num_instructors else 'Student'
+            created_at = self.random_time()
+            user_id = self.make_id(created_at)
+            self.insert('users', {
+                '_id': user_id,
+                'email': f'{role.lower()}{i}@bench.lms',
+                'password': password_hash,
+                'role': role,
+                'created_at': created_at,
+                'updated_at': created_at
+            })
+            if self.rng.random() < 0.7:
+                self.insert('profiles', {
+                    'user_id': str(user_id),
+                    'first_name': self.rng.choice(FIRST_NAMES),
+                    'last_name': self.rng.choice(LAST_NAMES),
+                    'bio': ' '.join(self.rng.choices(WORDS, k=self.rng.randint(0, 30))),
+                    'phone': f'+94{self.rng.randint(700000000, 799999999)}',
+                    'address': '',
+                    'created_at': created_at,
+                    'updated_at': created_at
+                })
+            if role == 'Instructor':
+                instructors.append((str(user_id), created_at))
+            elif role == 'Student':
+                students.append((str(user_id), created_at))
+        return instructors, students
+
+    def courses(self, num_courses, instructors, lessons_per_course):
+        """Generate courses (kept in memory until enrollment counts are known) and their lessons"""
+        owners = zipf_cum_weights(len(instructors))
+        courses, lesson_ids = [], {}
+        for _ in range(num_courses):
+            instructor_id, joined_at = self.rng.choices(instructors, cum_weights=owners)[0]
+            created_at = self.random_time(joined_at)
+            course = {
+                '_id': self.make_id(created_at),
+                'title': ' '.join(self.rng.sample(WORDS, 3)).title(),
+                'description': ' '.join(self.rng.choices(WORDS, k=long_tail(self.rng, 40))),
+                'instructor_id': instructor_id,
+                'category': weighted(self.rng, CATEGORIES),
+                'price': 0 if self.rng.random() < 0.3 else round(self.rng.lognormvariate(3.5, 0.6), 2),
+                'duration': long_tail(self.rng, 10),
+                'level': weighted(self.rng, LEVELS),
+                'is_published': self.rng.random() < 0.9,
+                'enrollment_count': 0,
+                'lesson_count': 0,
+                'created_at': created_at,
+                'updated_at': created_at
+            }
+            course['search_terms'] = get_search_terms(course)
+            courses.append(course)
+
+            course_id = str(course['_id'])
+            lesson_ids[course_id] = []
+            for order in range(1, long_tail(self.rng, lessons_per_course) + 1):
+                lesson_type = 'video' if self.rng.random() < 0.2 else 'text'
+                lesson_id = self.make_id(created_at)
+                self.insert('lessons', {
+                    '_id': lesson_id,
+                    'course_id': course_id,
+                    'title': f'Lesson {order}: ' + ' '.join(self.rng.sample(WORDS, 2)),
+                    'content': ' '.join(self.rng.choices(WORDS, k=long_tail(self.rng, 300, sigma=0.8))),
+                    'lesson_type': lesson_type,
+                    'video_url': f'https://videos.bench.lms/{lesson_id}' if lesson_type == 'video' else '',
+                    'order': order,
+                    'duration': long_tail(self.rng, 12),
+                    'created_at': created_at,
+                    'updated_at': created_at
+                })
+                lesson_ids[course_id].append(str(lesson_id))
+            course['lesson_count'] = len(lesson_ids[course_id])
+        return courses, lesson_ids
+
+    def enrollments(self, students, courses, lesson_ids, enrollments_per_student):
+        """Enroll students in published courses, weighted towards a few popular ones"""
+        published = [course for course in courses if course['is_published']]
+        if not published:
+            return
+        popularity = zipf_cum_weights(len(published))
+
+        for student_id, joined_at in students:
+            wanted = min(len(published), int(self.rng.expovariate(1 / enrollments_per_student)))
+            chosen = {}
+            for _ in range(wanted * 3):
+                if len(chosen) >= wanted:
+                    break
+                course = self.rng.choices(published, cum_weights=popularity)[0]
+                chosen[str(course['_id'])] = course
+
+            for course_id, course in chosen.items():
+                enrolled_at = self.random_time(max(joined_at, course['created_at']))
+                lessons = lesson_ids[course_id]
+                completed = lessons[:self.rng.randint(0, len(lessons))]
+                course['enrollment_count'] += 1
+                self.insert('enrollments', {
+                    'student_id': student_id,
+                    'course_id': course_id,
+                    'progress': len(completed) / len(lessons) * 100 if lessons else 0,
+                    'completed_lessons': completed,
+                    'enrolled_at': enrolled_at,
+                    'updated_at': enrolled_at
+                })
+
+def generate(users=1000, courses=100, lessons_per_course=8, enrollments_per_student=3, seed=42):
+    """Drop the benchmark collections and fill them with a synthetic dataset
+
+    Returns the number of documents inserted per collection.
+    """
+    drop_collections('users', 'profiles', 'courses', 'lessons', 'enrollments', 'course_stats')
+
+    generator = Generator(seed)
+    instructors, students = generator.users(users, hash_password(PASSWORD))
+    if courses and not instructors:
+        raise ValueError('Generating courses needs at least one instructor; increase users')
+    course_docs, lesson_ids = generator.courses(courses, instructors, lessons_per_course)
+    generator.enrollments(students, course_docs, lesson_ids, enrollments_per_student)
+    for course in course_docs:
+        generator.insert('courses', course)
+    generator.flush()
+    reconcile_course_stats()
+
+    # Building indexes once after loading is faster than maintaining them per insert
+    ensure_indexes()
+    return generator.inserted
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic LMS dataset')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--courses', type=int, default=100)
+    parser.add_argument('--lessons-per-course', type=int, default=8)
+    parser.add_argument('--enrollments-per-student', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    inserted = generate(args.users, args.courses, args.lessons_per_course, args.enrollments_per_student, args.seed)
+    for name, count in inserted.items():
+        print(f"{name}: {count}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""
+Load-test harness for the whole API
+Generates a synthetic dataset (benchmarks/datagen.py), then drives every
+blueprint route in-process through the Flask test client and reports
+p50/p95/p99 latency, serial throughput and Mongo commands per request.
+
+Usage: python benchmarks/harness.py [--mongomock] [--requests N] [--users N] [--courses N]
+                                    [--seed N] [--only TEXT] [--json PATH] [--compare PATH]
+Runs against MONGO_URI (DATABASE_NAME defaults to 'lms_bench' and is dropped
+first), or entirely in memory with --mongomock (pip install mongomock). It does not report
+commands or support $text, so queries per request are only shown and
+ranked search only succeeds against a real mongod.
+
+--json saves the results; --compare loads a saved run and exits with status 1
+if any route's p95 grew by more than --tolerance or it issues more commands.
+"""
+
+import sys
+import os
+import io
+import math
+import json
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+
+def percentile(timings, fraction):
+    """Nearest-rank percentile of sorted timings"""
+    return timings[max(0, math.ceil(fraction * len(timings)) - 1)]
+
+class Context:
+    """Sample users, courses and lessons picked from the generated dataset"""
+
+    def __init__(self, client, password):
+        from config import Config
+        from utils.auth import generate_token
+        from utils.database import users_collection, courses_collection, lessons_collection, enrollments_collection
+
+        self.client = client
+        self.password = password
+
+        # The most popular published course, its instructor and one of its students
+        course = courses_collection.find_one({'is_published': True}, sort=[('enrollment_count', -1)])
+        enrollment = enrollments_collection.find_one({'course_id': str(course['_id'])})
+        student = users_collection.find_one({'_id': ObjectId(enrollment['student_id'])})
+        admin = users_collection.find_one({'role': 'Admin'})
+        other = courses_collection.find_one({
+            'is_published': True,
+            '_id': {'$nin': [ObjectId(e['course_id']) for e in enrollments_collection.find({'student_id': str(student['_id'])})]}
+        })
+
+        self.course_id = str(course['_id'])
+        self.other_course_id = str(other['_id']) if other else self.course_id
+        self.lesson_id = str(lessons_collection.find_one({'course_id': self.course_id}, sort=[('order', 1)])['_id'])
+        self.student_email = student['email']
+        self.headers = {
+            'Student': {'Authorization': f"Bearer {generate_token(str(student['_id']), 'Student')}"},
+            'Instructor': {'Authorization': f"Bearer {generate_token(course['instructor_id'], 'Instructor')}"},
+            'Admin': {'Authorization': f"Bearer {generate_token(str(admin['_id']), 'Admin')}"},
+            'Metrics': {'Authorization': f'Bearer {Config.METRICS_TOKEN}'}
+        }
+        self.run_id = str(ObjectId())
+
+        # Not every generated user has a profile; the profile routes need one
+        client.post('/api/profile', json={'first_name': 'Bench'}, headers=self.headers['Student'])
+
+    def get(self, path, role='Student'):
+        return self.client.get(path, headers=self.headers[role])
+
+    def send(self, method, path, body, role='Student'):
+        return self.client.open(path, method=method, json=body, headers=self.headers[role])
+
+def import_rows(ctx, i):
+    rows = ''.join(
+        json.dumps({'email': f'import-{ctx.run_id}-{i}-{row}@bench.lms', 'password': ctx.password, 'role': 'Student'}) + '\n'
+        for row in range(5)
+    )
+    return ctx.client.post('/api/admin/import?format=ndjson', data=io.BytesIO(rows.encode('utf-8')),
+                           content_type='application/x-ndjson', headers=ctx.headers['Admin'])
+
+# (name, request factory); each factory sends one request for iteration i
+SCENARIOS = [
+    ('POST /api/auth/register', lambda ctx, i: ctx.client.post('/api/auth/register', json={
+        'email': f'register-{ctx.run_id}-{i}@bench.lms', 'password': ctx.password, 'role': 'Student'})),
+    ('POST /api/auth/login', lambda ctx, i: ctx.client.post('/api/auth/login', json={
+        'email': ctx.student_email, 'password': ctx.password})),
+    ('GET /api/auth/me', lambda ctx, i: ctx.get('/api/auth/me')),
+    ('GET /api/profile', lambda ctx, i: ctx.get('/api/profile')),
+    ('PUT /api/profile', lambda ctx, i: ctx.send('PUT', '/api/profile', {'bio': f'Updated {i}'})),
+    ('GET /api/courses?limit=50', lambda ctx, i: ctx.get('/api/courses?limit=50')),
+    ('GET /api/courses (filtered)', lambda ctx, i: ctx.get('/api/courses?category=Programming&sort=popular&limit=20')),
+    ('GET /api/courses/search', lambda ctx, i: ctx.get('/api/courses/search?q=python')),
+    ('GET /api/courses/search (prefix)', lambda ctx, i: ctx.get('/api/courses/search?q=pyt&mode=prefix')),
+    ('GET /api/courses/<id>', lambda ctx, i: ctx.get(f'/api/courses/{ctx.course_id}')),
+    ('POST /api/courses', lambda ctx, i: ctx.send('POST', '/api/courses', {
+        'title': f'Harness course {i}', 'category': 'Programming'}, 'Instructor')),
+    ('PUT /api/courses/<id>', lambda ctx, i: ctx.send('PUT', f'/api/courses/{ctx.course_id}', {
+        'description': f'Revision {i}'}, 'Instructor')),
+    ('GET /api/courses/<id>/lessons', lambda ctx, i: ctx.get(f'/api/courses/{ctx.course_id}/lessons')),
+    ('GET /api/lessons/<id>', lambda ctx, i: ctx.get(f'/api/lessons/{ctx.lesson_id}')),
+    ('PUT /api/lessons/<id>', lambda ctx, i: ctx.send('PUT', f'/api/lessons/{ctx.lesson_id}', {
+        'duration': i % 60}, 'Instructor')),
+    ('GET /api/enrollments (student)', lambda ctx, i: ctx.get('/api/enrollments')),
+    ('GET /api/enrollments (instructor)', lambda ctx, i: ctx.get('/api/enrollments', 'Instructor')),
+    ('GET /api/analytics/courses', lambda ctx, i: ctx.get('/api/analytics/courses', 'Instructor')),
+    ('PUT /api/progress', lambda ctx, i: ctx.send('PUT', '/api/progress', {
+        'course_id': ctx.course_id, 'lesson_id': ctx.lesson_id, 'completed': i % 2 == 0})),
+    ('POST|DELETE /api/enroll', lambda ctx, i: ctx.send('POST', '/api/enroll', {'course_id': ctx.other_course_id})
+        if i % 2 == 0 else ctx.send('DELETE', f'/api/enroll/{ctx.other_course_id}', None)),
+    ('GET /api/admin/cache-stats', lambda ctx, i: ctx.get('/api/admin/cache-stats', 'Admin')),
+    ('GET /metrics', lambda ctx, i: ctx.get('/metrics', 'Metrics')),
+    ('POST /api/admin/import (5 rows)', import_rows)
+]
+
+def run_scenario(ctx, counter, factory, num_requests):
+    timings = []
+    errors = 0
+    counter.count = 0
+    started = time.perf_counter()
+    for i in range(num_requests):
+        start = time.perf_counter()
+        response = factory(ctx, i)
+        timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            errors += 1
+    elapsed = time.perf_counter() - started
+    timings.sort()
+    return {
+        'requests': num_requests,
+        'errors': errors,
+        'p50': percentile(timings, 0.50),
+        'p95': percentile(timings, 0.95),
+        'p99': percentile(timings, 0.99),
+        'throughput': num_requests / elapsed,
+        'queries': counter.count / num_requests
+    }
+
+def compare(results, baseline, tolerance):
+    """Print regressions against a saved run; return True if there are none"""
+    ok = True
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result['p95'] > before['p95'] * (1 + tolerance):
+            print(f"REGRESSION {name}: p95 {before['p95']:.2f} -> {result['p95']:.2f} ms")
+            ok = False
+        if result['queries'] > before['queries']:
+            print(f"REGRESSION {name}: queries/request {before['queries']:.2f} -> {result['queries']:.2f}")
+            ok = False
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every API route in-process')
+    parser.add_argument('--mongomock', action='store_true', help='run against an in-memory mongomock database')
+    parser.add_argument('--requests', type=int, default=100, help='requests per route')
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--courses', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', help='only run routes whose name contains this text')
+    parser.add_argument('--json', help='save results to this file')
+    parser.add_argument('--compare', help='compare with results saved by --json')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95 growth for --compare')
+    args = parser.parse_args()
+
+    if args.mongomock:
+        # Must happen before utils.database imports MongoClient
+        import pymongo
+        import mongomock
+        pymongo.MongoClient = mongomock.MongoClient
+        os.environ.setdefault('MONGO_URI', 'mongodb://localhost:27017')
+        os.environ.setdefault('ENSURE_INDEXES', 'false')
+    # /metrics refuses scrapes without a token outside debug mode
+    os.environ.setdefault('METRICS_TOKEN', 'lms_bench')
+
+    from pymongo import monitoring
+    from benchmarks.common import CommandCounter, DATABASE_COMMANDS
+    from benchmarks.datagen import generate, PASSWORD
+    from app import app
+
+    counter = CommandCounter(DATABASE_COMMANDS)
+    monitoring.register(counter)
+
+    inserted = generate(users=args.users, courses=args.courses, seed=args.seed)
+    print('dataset: ' + ', '.join(f'{count} {name}' for name, count in inserted.items()))
+
+    ctx = Context(app.test_client(), PASSWORD)
+    queries_label = 'n/a' if args.mongomock else None
+
+    print(f"{'route':>36} {'err':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'queries':>8}")
+    results = {}
+    for name, factory in SCENARIOS:
+        if args.only and args.only not in name:
+            continue
+        result = results[name] = run_scenario(ctx, counter, factory, args.requests)
+        queries = queries_label or f"{result['queries']:.2f}"
+        print(f"{name:>36} {result['errors']:>5} {result['p50']:>8.2f} {result['p95']:>8.2f} "
+              f"{result['p99']:>8.2f} {result['throughput']:>8.0f} {queries:>8}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,3 +11,92 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'Binu2018')
     JWT_ALGORITHM = 'HS256'
     JWT_EXPIRATION_HOURS = 24
+    
+    # MongoDB client, created lazily once per process. Threaded and gevent
+    # workers share one pool per process, so keep MAX_POOL_SIZE >= WEB_THREADS.
+    # MONGO_COMPRESSORS is a comma-separated list such as 'zstd,snappy,zlib'.
+    MONGO_APPNAME = os.getenv('MONGO_APPNAME', 'learnsphere-api')
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 100))
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 300000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 10000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 10000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 10000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 30000))
+    MONGO_COMPRESSORS = os.getenv('MONGO_COMPRESSORS', '')
+    
+    # Production server (serve.py): WEB_WORKER_MODEL is processes, threads or gevent
+    WEB_WORKER_MODEL = os.getenv('WEB_WORKER_MODEL', 'processes')
+    # Each worker has its own bcrypt pool, Mongo pool and caches, so the count
+    # is fixed rather than following the host's (possibly large) CPU count
+    WEB_WORKERS = int(os.getenv('WEB_WORKERS', 4))
+    WEB_THREADS = int(os.getenv('WEB_THREADS', 8))
+    WEB_WORKER_CONNECTIONS = int(os.getenv('WEB_WORKER_CONNECTIONS', 1000))
+    WEB_TIMEOUT_SECONDS = int(os.getenv('WEB_TIMEOUT_SECONDS', 120))
+    
+    # Per-request Mongo command tracking: a query shape repeated more than
+    # QUERY_REPEAT_THRESHOLD times in one request is logged as a likely N+1
+    # (and raises when QUERY_REPEAT_STRICT is on or the app is testing)
+    QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', 10))
+    QUERY_REPEAT_STRICT = os.getenv('QUERY_REPEAT_STRICT', 'false').lower() == 'true'
+    
+    # /metrics: a background thread in each worker writes its counters to
+    # METRICS_DIR every METRICS_FLUSH_SECONDS so any worker can report all of
+    # them (serve.py uses a fresh temporary directory when unset; without one
+    # only the serving process is reported). Scrapers must send METRICS_TOKEN
+    # as a bearer token; without a token /metrics is only served in debug mode.
+    METRICS_DIR = os.getenv('METRICS_DIR', '')
+    METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', 5))
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    
+    # On-demand profiling: Admin requests sent with an X-Profile header, and a
+    # PROFILE_SAMPLE_RATE fraction of requests to PROFILE_ENDPOINTS (all when
+    # empty, e.g. 'course.get_courses,enrollment.get_enrollments'), are
+    # profiled with PROFILE_MODE 'cprofile' (.pstats) or 'sample' (collapsed
+    # stacks for flame graphs; gevent workers fall back to cprofile). The
+    # newest PROFILE_KEEP per endpoint are kept.
+    PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'lms-profiles'))
+    PROFILE_MODE = os.getenv('PROFILE_MODE', 'cprofile')
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_ENDPOINTS = [name for name in os.getenv('PROFILE_ENDPOINTS', '').split(',') if name]
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', 5))
+    PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', 20))
+    
+    # Responses larger than COMPRESS_MIN_SIZE bytes are gzip/brotli compressed
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+    
+    # Documents fetched per cursor batch by streaming list responses
+    STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 500))
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 1000))
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
+    # Rows accepted by POST /api/admin/import, whose passwords are hashed on
+    # the request thread (about 0.3 s each at cost 12). Larger files go
+    # through import_users.py.
+    IMPORT_MAX_REQUEST_ROWS = int(os.getenv('IMPORT_MAX_REQUEST_ROWS', 100))
+    
+    # Create registered indexes, and give courses without an enrollment_count
+    # or lesson_count theirs, when the app starts
+    ENSURE_INDEXES = os.getenv('ENSURE_INDEXES', 'true').lower() == 'true'
+    
+    # Cache of verified users used by token_required (0 TTL disables it)
+    USER_CACHE_TTL_SECONDS = int(os.getenv('USER_CACHE_TTL_SECONDS', 60))
+    USER_CACHE_MAX_SIZE = int(os.getenv('USER_CACHE_MAX_SIZE', 10000))
+    
+    # Cache of course documents, lesson lists and catalog pages: 'memory' (per
+    # process) or 'redis' (shared by all workers, needs the redis package)
+    CATALOG_CACHE_BACKEND = os.getenv('CATALOG_CACHE_BACKEND', 'memory')
+    CATALOG_CACHE_URL = os.getenv('CATALOG_CACHE_URL', 'redis://localhost:6379/0')
+    CATALOG_CACHE_TTL_SECONDS = int(os.getenv('CATALOG_CACHE_TTL_SECONDS', 60))
+    CATALOG_CACHE_MAX_SIZE = int(os.getenv('CATALOG_CACHE_MAX_SIZE', 5000))
+    # Lesson lists hold full lesson content, so they get their own smaller bound
+    # (number of courses whose lessons the memory backend keeps per process)
+    LESSON_CACHE_MAX_SIZE = int(os.getenv('LESSON_CACHE_MAX_SIZE', 200))
+    # Fraction of cache hits re-checked against Mongo to count stale reads
+    CATALOG_CACHE_VERIFY_RATE = float(os.getenv('CATALOG_CACHE_VERIFY_RATE', 0.01))
+    
+    # Password hashing (pool size 0 hashes inline on the request thread)
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    HASH_POOL_SIZE = int(os.getenv('HASH_POOL_SIZE', 2))
+    HASH_QUEUE_LIMIT = int(os.getenv('HASH_QUEUE_LIMIT', 16))
+    HASH_TIMEOUT_SECONDS = int(os.getenv('HASH_TIMEOUT_SECONDS', 10))
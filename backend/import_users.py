@@ -0,0 +1,42 @@
+"""
+Bulk import script for the LMS
+  python import_users.py students.csv [--format csv|ndjson] [--batch-size N] [--hash-workers N]
+
+CSV columns: email, password, role, first_name, last_name, course_ids
+(course_ids separated by ';'). NDJSON lines use the same keys.
+
+Password hashing dominates: at the default bcrypt cost a hash takes about
+0.3 s of CPU, so plan on roughly rows * 0.3 s / --hash-workers (about 10
+minutes for 50,000 new users on 24 cores). The script has its own hashing
+processes, so running it next to the API does not slow down logins beyond
+the shared CPU.
+"""
+
+import sys
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from utils.bulk_import import BulkImporter, parse_rows
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk import users, profiles and enrollments')
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=('csv', 'ndjson'))
+    parser.add_argument('--batch-size', type=int, default=Config.IMPORT_BATCH_SIZE)
+    parser.add_argument('--hash-workers', type=int, default=os.cpu_count(), help='processes hashing passwords')
+    args = parser.parse_args()
+
+    file_format = args.format or ('ndjson' if args.path.endswith(('.ndjson', '.jsonl')) else 'csv')
+
+    with open(args.path, 'rb') as stream, ProcessPoolExecutor(max_workers=max(1, args.hash_workers)) as pool:
+        summary = BulkImporter(max(1, args.batch_size), pool).run(parse_rows(stream, file_format))
+
+    print(json.dumps(summary, indent=2))
+    return 1 if summary['error_count'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+Index management script for the LMS
+  python manage_indexes.py apply   Create all registered indexes (idempotent)
+  python manage_indexes.py audit   Apply indexes, then fail if any route query plan uses a COLLSCAN
+  python manage_indexes.py search-terms   Compute prefix search terms for courses that lack them
+  python manage_indexes.py enrollment-counts   Recompute each course's enrollment_count (catalog ?sort=popular)
+  python manage_indexes.py course-stats   Reconcile course_stats (instructor analytics) with the enrollments;
+                                          converges over runs, so schedule it periodically, e.g. hourly from cron
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.indexes import ensure_indexes, audit_query_plans
+from utils.search import backfill_search_terms
+from utils.catalog import backfill_enrollment_counts
+from utils.course_stats import reconcile_course_stats
+
+def apply_indexes():
+    """Create all registered indexes"""
+    for collection_name, names in ensure_indexes().items():
+        print(f"{collection_name}: {', '.join(names)}")
+
+def audit():
+    """Report route query shapes that are not served by an index"""
+    ensure_indexes()
+    problems = audit_query_plans()
+
+    for description, collection_name, problem in problems:
+        print(f"FAIL {collection_name}: {description} ({problem})")
+
+    if problems:
+        return 1
+
+    print("All route query shapes use an index")
+    return 0
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'apply'
+
+    if command == 'apply':
+        apply_indexes()
+    elif command == 'audit':
+        sys.exit(audit())
+    elif command == 'search-terms':
+        print(f"Updated search terms for {backfill_search_terms()} courses")
+    elif command == 'enrollment-counts':
+        print(f"Updated enrollment counts for {backfill_enrollment_counts()} courses")
+    elif command == 'course-stats':
+        print(f"Reconciled course stats for {reconcile_course_stats()} courses")
+    else:
+        print(__doc__)
+        sys.exit(2)
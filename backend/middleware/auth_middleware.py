@@ -5,8 +5,26 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from functools import wraps
 from flask import request, jsonify
 from bson import ObjectId
+from config import Config
 from utils.auth import verify_token
+from utils.cache import TTLCache
 from utils.database import users_collection
+from utils.metrics import register_cache
+
+# Users confirmed to exist, keyed by user id. Saves a users lookup on every
+# authenticated request; entries are dropped on account deletion and expire
+# after USER_CACHE_TTL_SECONDS so deletions in other worker processes are
+# picked up within that window.
+user_cache = TTLCache(maxsize=Config.USER_CACHE_MAX_SIZE, ttl=Config.USER_CACHE_TTL_SECONDS)
+register_cache('users', user_cache.stats)
+
+def invalidate_user(user_id):
+    """Drop a user from the verified user cache"""
+    user_cache.delete(str(user_id))
+
+def get_user_cache_stats():
+    """Return hit/miss counters of the verified user cache"""
+    return user_cache.stats()
 
 def token_required(f):
     """Decorator to require JWT token"""
@@ -28,13 +46,20 @@ def token_required(f):
         if not payload:
             return jsonify({'message': 'Token is invalid or expired'}), 401
         
-        try:
-            user = users_collection.find_one({'_id': ObjectId(payload['user_id'])})
-        except:
-            user = None
-        
-        if not user:
-            return jsonify({'message': 'User not found'}), 401
+        user_exists = user_cache.get(payload['user_id'], False)
+        if not user_exists:
+            try:
+                user_exists = users_collection.find_one(
+                    {'_id': ObjectId(payload['user_id'])},
+                    {'_id': 1}
+                ) is not None
+            except:
+                user_exists = False
+            
+            if not user_exists:
+                return jsonify({'message': 'User not found'}), 401
+            
+            user_cache.set(payload['user_id'], True)
         
         request.current_user = {
             'user_id': payload['user_id'],
@@ -1,5 +1,6 @@
 from datetime import datetime
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
 class User:
     @staticmethod
@@ -20,7 +21,10 @@ class User:
             'updated_at': datetime.utcnow()
         }
         
-        result = users_collection.insert_one(user)
+        try:
+            result = users_collection.insert_one(user)
+        except DuplicateKeyError:
+            return None
         user['_id'] = str(result.inserted_id)
         user.pop('password', None)
         return user
@@ -41,10 +45,22 @@ class User:
             user.pop('password', None)
         return user
     
+    @staticmethod
+    def update_password_hash(user_id, password):
+        """Re-hash a password with the current cost factor"""
+        from utils.database import users_collection
+        from utils.auth import hash_password
+        users_collection.update_one(
+            {'_id': ObjectId(user_id)},
+            {'$set': {'password': hash_password(password), 'updated_at': datetime.utcnow()}}
+        )
+    
     @staticmethod
     def delete_user(user_id):
         """Delete user by ID"""
         from utils.database import users_collection, profiles_collection
+        from middleware.auth_middleware import invalidate_user
         users_collection.delete_one({'_id': ObjectId(user_id)})
         profiles_collection.delete_one({'user_id': user_id})
+        invalidate_user(user_id)
         return True
@@ -0,0 +1,103 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from itertools import islice
+from flask import Blueprint, request, jsonify, send_from_directory
+from werkzeug.exceptions import NotFound
+from config import Config
+from middleware.auth_middleware import role_required, get_user_cache_stats
+from utils.bulk_import import BulkImporter, parse_rows
+from utils.catalog_cache import get_catalog_cache_stats
+from utils.query_stats import allow_repeated_queries
+from utils.profiling import list_captures
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+@admin_bp.route('/import', methods=['POST'])
+@role_required('Admin')
+def import_users():
+    """Bulk import users, profiles and enrollments from a CSV or NDJSON upload (Admin only)
+
+    Takes at most IMPORT_MAX_REQUEST_ROWS rows, so the import fits in one
+    request; bigger files are imported with import_users.py.
+    """
+    try:
+        # Each batch repeats the same lookups by design
+        allow_repeated_queries()
+        
+        upload = request.files.get('file')
+        if upload:
+            stream = upload.stream
+            default_format = 'ndjson' if (upload.filename or '').endswith(('.ndjson', '.jsonl')) else 'csv'
+        else:
+            stream = request.stream
+            default_format = 'ndjson' if request.mimetype == 'application/x-ndjson' else 'csv'
+        
+        file_format = request.args.get('format', default_format)
+        if file_format not in ('csv', 'ndjson'):
+            return jsonify({'message': 'format must be csv or ndjson'}), 400
+        
+        try:
+            batch_size = int(request.args.get('batch_size', Config.IMPORT_BATCH_SIZE))
+        except ValueError:
+            return jsonify({'message': 'batch_size must be an integer'}), 400
+        
+        # Read one row past the limit to reject oversized files before writing anything
+        rows = list(islice(parse_rows(stream, file_format), Config.IMPORT_MAX_REQUEST_ROWS + 1))
+        if len(rows) > Config.IMPORT_MAX_REQUEST_ROWS:
+            return jsonify({
+                'message': f'At most {Config.IMPORT_MAX_REQUEST_ROWS} rows per request; import larger files with import_users.py'
+            }), 413
+        
+        summary = BulkImporter(max(1, batch_size)).run(rows)
+        
+        return jsonify({
+            'message': 'Import completed',
+            'summary': summary
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@admin_bp.route('/cache-stats', methods=['GET'])
+@role_required('Admin')
+def cache_stats():
+    """Get hit ratios of the in-process caches and sampled catalog stale reads (Admin only)"""
+    try:
+        return jsonify({
+            'catalog': get_catalog_cache_stats(),
+            'users': get_user_cache_stats()
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@admin_bp.route('/profiles', methods=['GET'])
+@role_required('Admin')
+def get_profiles():
+    """List the newest profiler captures, optionally of one endpoint (Admin only)"""
+    try:
+        try:
+            limit = int(request.args.get('limit', 50))
+        except ValueError:
+            return jsonify({'message': 'limit must be an integer'}), 400
+        
+        return jsonify({
+            'profiles': list_captures(request.args.get('endpoint'), max(1, limit))
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@admin_bp.route('/profiles/<endpoint>/<filename>', methods=['GET'])
+@role_required('Admin')
+def download_profile(endpoint, filename):
+    """Download a profiler capture (.pstats or .folded) (Admin only)"""
+    try:
+        return send_from_directory(Config.PROFILE_DIR, f'{endpoint}/{filename}', as_attachment=True)
+    
+    except NotFound:
+        return jsonify({'message': 'Profile not found'}), 404
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
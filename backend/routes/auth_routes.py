@@ -4,7 +4,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from flask import Blueprint, request, jsonify
 from models.user import User
-from utils.auth import verify_password, generate_token
+from utils.auth import verify_password, generate_token, needs_rehash, HashPoolBusy
 from middleware.auth_middleware import token_required
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
@@ -38,6 +38,8 @@ def register():
             'user': user
         }), 201
     
+    except HashPoolBusy:
+        return jsonify({'message': 'Server is busy, please try again'}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
@@ -57,9 +59,15 @@ def login():
         if not user or not verify_password(password, user['password']):
             return jsonify({'message': 'Invalid credentials'}), 401
         
+        # Upgrade hashes made with an outdated cost factor
+        if needs_rehash(user['password']):
+            try:
+                User.update_password_hash(user['_id'], password)
+            except HashPoolBusy:
+                pass
+        
         token = generate_token(str(user['_id']), user['role'])
         
-        user['_id'] = str(user['_id'])
         user.pop('password', None)
         
         return jsonify({
@@ -68,6 +76,8 @@ def login():
             'user': user
         }), 200
     
+    except HashPoolBusy:
+        return jsonify({'message': 'Server is busy, please try again'}), 503, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
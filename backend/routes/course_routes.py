@@ -2,14 +2,46 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import re
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
 from datetime import datetime
 from middleware.auth_middleware import token_required, role_required
 from utils.database import courses_collection, lessons_collection
+from config import Config
+from utils.pagination import paginate, has_page_params, get_page_params, encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE
+from utils.catalog import build_catalog_query, get_catalog_sort
+from utils.catalog_cache import (
+    get_cached_course, get_course_lessons, get_page_key, get_cached_page, cache_page, get_popularity_generation,
+    invalidate_catalog, invalidate_course
+)
+from utils.search import get_search_terms, update_search_terms, build_prefix_query, SEARCH_TERM_FIELDS, HIDDEN_COURSE_FIELDS
+from utils.streaming import get_stream_format, iter_batches, stream_documents
+from utils.lesson_counts import get_lesson_counts
+from utils.course_stats import delete_course_stats
+from utils.updates import update_fields
+from utils.projection import get_projection, LESSON_FIELDS, LESSON_SUMMARY_EXCLUDE
+from utils.conditional import make_etag, is_not_modified, not_modified, set_validators
 
 course_bp = Blueprint('course', __name__, url_prefix='/api/courses')
 
+COURSE_UPDATE_FIELDS = ('title', 'description', 'category', 'price', 'duration', 'level', 'is_published')
+
+def get_catalog_version():
+    """Get a cheap version of the whole catalog: course count and newest updated_at
+
+    Lesson writes bump their course's updated_at, so lesson counts are covered too.
+    """
+    latest = courses_collection.find_one({}, {'updated_at': 1}, sort=[('updated_at', -1)])
+    return courses_collection.estimated_document_count(), latest.get('updated_at') if latest else None
+
+def add_lesson_counts(courses):
+    """Set lesson_count on each course using a single aggregation"""
+    lesson_counts = get_lesson_counts([str(course['_id']) for course in courses])
+    for course in courses:
+        course['lesson_count'] = lesson_counts.get(str(course['_id']), 0)
+    return courses
+
 @course_bp.route('', methods=['POST'])
 @role_required('Admin', 'Instructor')
 def create_course():
@@ -28,6 +60,8 @@ def create_course():
             'duration': data.get('duration', 0),
             'level': data.get('level', 'Beginner'),
             'is_published': data.get('is_published', False),
+            'enrollment_count': 0,
+            'lesson_count': 0,
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow()
         }
@@ -35,8 +69,13 @@ def create_course():
         if not course['title']:
             return jsonify({'message': 'Title is required'}), 400
         
+        course['search_terms'] = get_search_terms(course)
+        
         result = courses_collection.insert_one(course)
         course['_id'] = str(result.inserted_id)
+        for field in HIDDEN_COURSE_FIELDS:
+            course.pop(field)
+        invalidate_catalog()
         
         return jsonify({
             'message': 'Course created successfully',
@@ -49,43 +88,149 @@ def create_course():
 @course_bp.route('', methods=['GET'])
 @token_required
 def get_courses():
-    """Get all courses"""
+    """Get all courses (supports filters, ?sort=, pagination, ?stream=true and NDJSON streaming)"""
     try:
-        courses = list(courses_collection.find())
+        from flask import request as req
+        role = req.current_user['role']
+        query = build_catalog_query(role)
+        sort_keys, direction = get_catalog_sort()
+        
+        # Enrollments do not bump updated_at, so pages ordered by enrollment_count
+        # also carry the popularity generation that enrollment changes bump
+        popularity = get_popularity_generation() if sort_keys[0] == 'enrollment_count' else None
+        
+        # Pages are cached under the role (visibility) and full query string
+        stream_format = get_stream_format()
+        if not stream_format:
+            page_key = get_page_key(role, popularity, request.query_string.decode('utf-8'))
+            page = get_cached_page(page_key, get_catalog_version)
+            if page is not None:
+                if is_not_modified(page['etag']):
+                    return not_modified(page['etag'])
+                response = jsonify({'courses': page['courses'], 'next_cursor': page['next_cursor']})
+                return set_validators(response, page['etag']), 200
+        
+        # NDJSON is negotiated via Accept and visibility depends on the role, so both are part of the ETag
+        version = get_catalog_version()
+        etag = make_etag('courses', stream_format, role, popularity, *version)
+        if is_not_modified(etag):
+            return not_modified(etag)
         
-        for course in courses:
-            course['_id'] = str(course['_id'])
-            # Get lesson count
-            lesson_count = lessons_collection.count_documents({'course_id': str(course['_id'])})
-            course['lesson_count'] = lesson_count
+        if stream_format:
+            if has_page_params():
+                return jsonify({'message': 'Streaming responses do not support limit or cursor'}), 400
+            
+            cursor = courses_collection.find(query, dict(HIDDEN_COURSE_FIELDS)).sort([(key, direction) for key in sort_keys])
+            cursor = cursor.batch_size(Config.STREAM_BATCH_SIZE)
+            batches = (add_lesson_counts(batch) for batch in iter_batches(cursor, Config.STREAM_BATCH_SIZE))
+            return set_validators(stream_documents(batches, 'courses', stream_format), etag)
         
-        return jsonify({'courses': courses}), 200
+        courses, next_cursor = paginate(courses_collection, query, sort_keys, dict(HIDDEN_COURSE_FIELDS), direction)
+        add_lesson_counts(courses)
+        cache_page(page_key, version, {'etag': etag, 'courses': courses, 'next_cursor': next_cursor})
+        
+        return set_validators(jsonify({'courses': courses, 'next_cursor': next_cursor}), etag), 200
     
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@course_bp.route('/search', methods=['GET'])
+@token_required
+def search_courses():
+    """Search courses by ?q= (ranked text search, or ?mode=prefix for autocomplete)
+
+    Results are paginated with ?limit= and the opaque ?cursor= from next_cursor.
+    Students only see published courses.
+    """
+    try:
+        from flask import request as req
+        text = request.args.get('q', '').strip()
+        mode = request.args.get('mode', 'text')
+        if not text:
+            return jsonify({'message': 'q is required'}), 400
+        if mode not in ('text', 'prefix'):
+            return jsonify({'message': 'mode must be text or prefix'}), 400
+        
+        limit, cursor = get_page_params()
+        limit = limit or DEFAULT_PAGE_SIZE
+        offset = decode_cursor(cursor, ['offset'])[0] if cursor else 0
+        if not isinstance(offset, int) or offset < 0:
+            return jsonify({'message': 'Invalid cursor'}), 400
+        
+        if mode == 'prefix':
+            query = build_prefix_query(text)
+            if query is None:
+                return jsonify({'courses': [], 'next_cursor': None}), 200
+            projection = dict(HIDDEN_COURSE_FIELDS)
+        else:
+            query = {'$text': {'$search': text}}
+            projection = dict(HIDDEN_COURSE_FIELDS, score={'$meta': 'textScore'})
+        
+        if req.current_user['role'] == 'Student':
+            query['is_published'] = True
+        
+        # Fetch one extra document to know whether another page exists.
+        # _id breaks ties so skip-based pages stay stable.
+        if mode == 'text':
+            results = courses_collection.find(query, projection)
+            results = results.sort([('score', {'$meta': 'textScore'}), ('_id', 1)])
+            courses = list(results.skip(offset).limit(limit + 1))
+        else:
+            # Courses whose title starts with the typed text rank first
+            courses = list(courses_collection.aggregate([
+                {'$match': query},
+                {'$addFields': {'title_rank': {'$cond': [
+                    {'$regexMatch': {'input': {'$ifNull': ['$title', '']}, 'regex': '^' + re.escape(text), 'options': 'i'}},
+                    0, 1
+                ]}}},
+                {'$sort': {'title_rank': 1, '_id': 1}},
+                {'$skip': offset},
+                {'$limit': limit + 1},
+                {'$project': dict(projection, title_rank=0)}
+            ]))
+        
+        next_cursor = None
+        if len(courses) > limit:
+            courses = courses[:limit]
+            next_cursor = encode_cursor([offset + limit])
+        
+        add_lesson_counts(courses)
+        
+        return jsonify({'courses': courses, 'next_cursor': next_cursor}), 200
+    
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
 @course_bp.route('/<course_id>', methods=['GET'])
 @token_required
 def get_course(course_id):
-    """Get a specific course"""
+    """Get a specific course (?fields= and ?view=summary apply to its lessons)"""
     try:
-        course = courses_collection.find_one({'_id': ObjectId(course_id)})
+        projection = get_projection(LESSON_FIELDS, LESSON_SUMMARY_EXCLUDE)
+        course = get_cached_course(course_id)
         
         if not course:
             return jsonify({'message': 'Course not found'}), 404
         
-        course['_id'] = str(course['_id'])
+        # Lesson writes bump the course's updated_at, so it versions the lessons too
+        etag = make_etag(course['_id'], course.get('updated_at'))
+        if is_not_modified(etag, course.get('updated_at')):
+            return not_modified(etag, course.get('updated_at'))
         
         # Get lessons for this course
-        lessons = list(lessons_collection.find({'course_id': course_id}))
-        for lesson in lessons:
-            lesson['_id'] = str(lesson['_id'])
+        lessons = get_course_lessons(course, projection)
         
         course['lessons'] = lessons
         course['lesson_count'] = len(lessons)
         
-        return jsonify({'course': course}), 200
+        return set_validators(jsonify({'course': course}), etag, course.get('updated_at')), 200
     
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
@@ -98,33 +243,21 @@ def update_course(course_id):
         user_id = req.current_user['user_id']
         data = request.get_json()
         
-        course = courses_collection.find_one({'_id': ObjectId(course_id)})
+        # Only the instructor or an admin may update; checked in the update filter
+        query = {'_id': ObjectId(course_id)}
+        if req.current_user['role'] != 'Admin':
+            query['instructor_id'] = user_id
         
-        if not course:
-            return jsonify({'message': 'Course not found'}), 404
-        
-        # Check if user is the instructor or admin
-        if course['instructor_id'] != user_id and req.current_user['role'] != 'Admin':
-            return jsonify({'message': 'You can only update your own courses'}), 403
-        
-        update_data = {
-            'title': data.get('title', course.get('title')),
-            'description': data.get('description', course.get('description', '')),
-            'category': data.get('category', course.get('category', '')),
-            'price': data.get('price', course.get('price', 0)),
-            'duration': data.get('duration', course.get('duration', 0)),
-            'level': data.get('level', course.get('level', 'Beginner')),
-            'is_published': data.get('is_published', course.get('is_published', False)),
-            'updated_at': datetime.utcnow()
-        }
+        updated_course = update_fields(courses_collection, query, data, COURSE_UPDATE_FIELDS, dict(HIDDEN_COURSE_FIELDS))
         
-        courses_collection.update_one(
-            {'_id': ObjectId(course_id)},
-            {'$set': update_data}
-        )
+        if not updated_course:
+            if courses_collection.find_one({'_id': ObjectId(course_id)}, {'_id': 1}):
+                return jsonify({'message': 'You can only update your own courses'}), 403
+            return jsonify({'message': 'Course not found'}), 404
         
-        updated_course = courses_collection.find_one({'_id': ObjectId(course_id)})
-        updated_course['_id'] = str(updated_course['_id'])
+        if any(field in data for field in SEARCH_TERM_FIELDS):
+            update_search_terms(updated_course)
+        invalidate_course(course_id)
         
         return jsonify({
             'message': 'Course updated successfully',
@@ -154,6 +287,8 @@ def delete_course(course_id):
         # Delete course and its lessons
         courses_collection.delete_one({'_id': ObjectId(course_id)})
         lessons_collection.delete_many({'course_id': course_id})
+        delete_course_stats(course_id)
+        invalidate_course(course_id)
         
         return jsonify({'message': 'Course deleted successfully'}), 200
     
@@ -4,12 +4,53 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime
 from middleware.auth_middleware import token_required, role_required
-from utils.database import enrollments_collection, courses_collection, lessons_collection
+from utils.database import enrollments_collection, courses_collection, lessons_collection, users_collection
+from config import Config
+from utils.pagination import paginate, has_page_params
+from utils.search import HIDDEN_COURSE_FIELDS
+from utils.catalog import change_enrollment_counts
+from utils.streaming import get_stream_format, iter_batches, stream_documents, stream_csv
+from utils.lesson_counts import get_lesson_count
+from utils.course_stats import change_course_stats, enrollment_change, progress_change, get_course_analytics
 
 enrollment_bp = Blueprint('enrollment', __name__, url_prefix='/api')
 
+EXPORT_COLUMNS = (
+    'enrollment_id', 'student_id', 'student_email', 'course_id', 'course_title',
+    'progress', 'completed_lessons', 'enrolled_at', 'updated_at'
+)
+MAX_EXPORT_CHUNK_SIZE = 10000
+
+def attach_courses(enrollments):
+    """Set course on each enrollment with one $in fetch for all of them"""
+    course_ids = {enrollment['course_id'] for enrollment in enrollments}
+    courses = {}
+    if course_ids:
+        object_ids = [ObjectId(course_id) for course_id in course_ids if ObjectId.is_valid(course_id)]
+        for course in courses_collection.find({'_id': {'$in': object_ids}}, dict(HIDDEN_COURSE_FIELDS)):
+            courses[str(course['_id'])] = course
+    
+    for enrollment in enrollments:
+        course = courses.get(enrollment['course_id'])
+        if course:
+            enrollment['course'] = course
+    return enrollments
+
+def apply_progress(enrollment, lesson_id, completed, total_lessons, updated_at):
+    """Return enrollment after the update_progress pipeline: lesson added or removed, progress recomputed"""
+    completed_lessons = list(enrollment.get('completed_lessons', []))
+    if not completed:
+        completed_lessons = [lesson for lesson in completed_lessons if lesson != lesson_id]
+    elif lesson_id not in completed_lessons:
+        completed_lessons.append(lesson_id)
+    
+    progress = min(100, len(completed_lessons) / total_lessons * 100) if total_lessons > 0 else 0
+    return dict(enrollment, completed_lessons=completed_lessons, progress=progress, updated_at=updated_at)
+
 @enrollment_bp.route('/enroll', methods=['POST'])
 @role_required('Student')
 def enroll_in_course():
@@ -24,7 +65,7 @@ def enroll_in_course():
             return jsonify({'message': 'Course ID is required'}), 400
         
         # Verify course exists
-        course = courses_collection.find_one({'_id': ObjectId(course_id)})
+        course = courses_collection.find_one({'_id': ObjectId(course_id)}, {'_id': 1})
         if not course:
             return jsonify({'message': 'Course not found'}), 404
         
@@ -46,8 +87,13 @@ def enroll_in_course():
             'updated_at': datetime.utcnow()
         }
         
-        result = enrollments_collection.insert_one(enrollment)
+        try:
+            result = enrollments_collection.insert_one(enrollment)
+        except DuplicateKeyError:
+            return jsonify({'message': 'Already enrolled in this course'}), 400
         enrollment['_id'] = str(result.inserted_id)
+        change_enrollment_counts({course_id: 1})
+        change_course_stats({course_id: enrollment_change(0)})
         
         return jsonify({
             'message': 'Enrolled successfully',
@@ -60,7 +106,7 @@ def enroll_in_course():
 @enrollment_bp.route('/enrollments', methods=['GET'])
 @token_required
 def get_enrollments():
-    """Get enrollments (filtered by role)"""
+    """Get enrollments (filtered by role, supports pagination, ?stream=true and NDJSON streaming)"""
     try:
         from flask import request as req
         user_id = req.current_user['user_id']
@@ -70,22 +116,94 @@ def get_enrollments():
         if role == 'Student':
             query['student_id'] = user_id
         elif role == 'Instructor':
-            # Get courses taught by this instructor
-            courses = list(courses_collection.find({'instructor_id': user_id}))
+            # Get ids of courses taught by this instructor
+            courses = courses_collection.find({'instructor_id': user_id}, {'_id': 1})
             course_ids = [str(c['_id']) for c in courses]
             query['course_id'] = {'$in': course_ids}
         
-        enrollments = list(enrollments_collection.find(query))
+        stream_format = get_stream_format()
+        if stream_format:
+            if has_page_params():
+                return jsonify({'message': 'Streaming responses do not support limit or cursor'}), 400
+            
+            cursor = enrollments_collection.find(query).sort('_id', 1).batch_size(Config.STREAM_BATCH_SIZE)
+            batches = (attach_courses(batch) for batch in iter_batches(cursor, Config.STREAM_BATCH_SIZE))
+            return stream_documents(batches, 'enrollments', stream_format)
+        
+        enrollments, next_cursor = paginate(enrollments_collection, query)
+        
+        # Populate course information with one $in fetch for the whole page
+        attach_courses(enrollments)
+        
+        return jsonify({'enrollments': enrollments, 'next_cursor': next_cursor}), 200
+    
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+def export_rows(cursor, chunk_size, course_titles):
+    """Turn an enrollment cursor into batches of flat export rows
+
+    Student emails are fetched per chunk; course titles are cached in
+    course_titles since there are far fewer courses than enrollments.
+    """
+    for batch in iter_batches(cursor, chunk_size):
+        missing = {e['course_id'] for e in batch if e['course_id'] not in course_titles}
+        if missing:
+            object_ids = [ObjectId(course_id) for course_id in missing if ObjectId.is_valid(course_id)]
+            for course in courses_collection.find({'_id': {'$in': object_ids}}, {'title': 1}):
+                course_titles[str(course['_id'])] = course.get('title')
+            for course_id in missing:
+                course_titles.setdefault(course_id, None)
+        
+        student_ids = [ObjectId(e['student_id']) for e in batch if ObjectId.is_valid(e['student_id'])]
+        emails = {
+            str(user['_id']): user.get('email')
+            for user in users_collection.find({'_id': {'$in': student_ids}}, {'email': 1})
+        }
+        
+        yield [{
+            'enrollment_id': str(e['_id']),
+            'student_id': e['student_id'],
+            'student_email': emails.get(e['student_id']),
+            'course_id': e['course_id'],
+            'course_title': course_titles.get(e['course_id']),
+            'progress': e.get('progress', 0),
+            'completed_lessons': len(e.get('completed_lessons', [])),
+            'enrolled_at': e.get('enrolled_at'),
+            'updated_at': e.get('updated_at')
+        } for e in batch]
+
+@enrollment_bp.route('/enrollments/export', methods=['GET'])
+@role_required('Instructor', 'Admin')
+def export_enrollments():
+    """Stream enrollment progress as CSV or NDJSON (Instructor/Admin only)"""
+    try:
+        from flask import request as req
+        export_format = request.args.get('format', 'csv')
+        if export_format not in ('csv', 'ndjson'):
+            return jsonify({'message': 'format must be csv or ndjson'}), 400
+        
+        try:
+            chunk_size = int(request.args.get('chunk_size', Config.EXPORT_CHUNK_SIZE))
+        except ValueError:
+            return jsonify({'message': 'chunk_size must be an integer'}), 400
+        chunk_size = max(1, min(chunk_size, MAX_EXPORT_CHUNK_SIZE))
+        
+        query = {}
+        course_titles = {}
+        if req.current_user['role'] == 'Instructor':
+            courses = courses_collection.find({'instructor_id': req.current_user['user_id']}, {'title': 1})
+            course_titles = {str(c['_id']): c.get('title') for c in courses}
+            query['course_id'] = {'$in': list(course_titles)}
         
-        # Populate course information
-        for enrollment in enrollments:
-            enrollment['_id'] = str(enrollment['_id'])
-            course = courses_collection.find_one({'_id': ObjectId(enrollment['course_id'])})
-            if course:
-                course['_id'] = str(course['_id'])
-                enrollment['course'] = course
+        cursor = enrollments_collection.find(query).sort('_id', 1).batch_size(chunk_size)
+        batches = export_rows(cursor, chunk_size, course_titles)
         
-        return jsonify({'enrollments': enrollments}), 200
+        if export_format == 'ndjson':
+            return stream_documents(batches, 'enrollments', 'ndjson')
+        return stream_csv(batches, EXPORT_COLUMNS, 'enrollments.csv')
     
     except Exception as e:
         return jsonify({'message': str(e)}), 500
@@ -106,51 +224,55 @@ def update_progress():
         if not course_id or not lesson_id:
             return jsonify({'message': 'Course ID and Lesson ID are required'}), 400
         
-        # Verify enrollment
-        enrollment = enrollments_collection.find_one({
-            'student_id': student_id,
-            'course_id': course_id
-        })
-        
-        if not enrollment:
-            return jsonify({'message': 'Not enrolled in this course'}), 404
-        
         # Verify lesson exists in course
         lesson = lessons_collection.find_one({
             '_id': ObjectId(lesson_id),
             'course_id': course_id
-        })
+        }, {'_id': 1})
         
         if not lesson:
             return jsonify({'message': 'Lesson not found in this course'}), 404
         
-        # Update completed lessons
-        completed_lessons = enrollment.get('completed_lessons', [])
+        total_lessons = get_lesson_count(course_id)
         
+        # Add or remove the lesson and recompute progress atomically on the server,
+        # so concurrent updates to the same enrollment cannot overwrite each other
+        completed_lessons = {'$ifNull': ['$completed_lessons', []]}
         if completed:
-            if lesson_id not in completed_lessons:
-                completed_lessons.append(lesson_id)
+            completed_lessons = {'$cond': [
+                {'$in': [lesson_id, completed_lessons]},
+                completed_lessons,
+                {'$concatArrays': [completed_lessons, [lesson_id]]}
+            ]}
+        else:
+            completed_lessons = {'$filter': {
+                'input': completed_lessons,
+                'cond': {'$ne': ['$$this', lesson_id]}
+            }}
+        
+        # Capped at 100: completed_lessons may still list lessons deleted since
+        if total_lessons > 0:
+            progress = {'$min': [100, {'$multiply': [{'$divide': [{'$size': '$completed_lessons'}, total_lessons]}, 100]}]}
         else:
-            if lesson_id in completed_lessons:
-                completed_lessons.remove(lesson_id)
-        
-        # Calculate progress percentage
-        total_lessons = lessons_collection.count_documents({'course_id': course_id})
-        progress = (len(completed_lessons) / total_lessons * 100) if total_lessons > 0 else 0
-        
-        enrollments_collection.update_one(
-            {'_id': enrollment['_id']},
-            {
-                '$set': {
-                    'completed_lessons': completed_lessons,
-                    'progress': progress,
-                    'updated_at': datetime.utcnow()
-                }
-            }
+            progress = 0
+        
+        # The previous version gives the progress delta for course_stats;
+        # the new one is derived the same way the pipeline derives it
+        now = datetime.utcnow()
+        previous = enrollments_collection.find_one_and_update(
+            {'student_id': student_id, 'course_id': course_id},
+            [
+                {'$set': {'completed_lessons': completed_lessons}},
+                {'$set': {'progress': progress, 'updated_at': now}}
+            ],
+            return_document=ReturnDocument.BEFORE
         )
         
-        updated_enrollment = enrollments_collection.find_one({'_id': enrollment['_id']})
-        updated_enrollment['_id'] = str(updated_enrollment['_id'])
+        if not previous:
+            return jsonify({'message': 'Not enrolled in this course'}), 404
+        
+        updated_enrollment = apply_progress(previous, lesson_id, completed, total_lessons, now)
+        change_course_stats({course_id: progress_change(previous.get('progress'), updated_enrollment['progress'])})
         
         return jsonify({
             'message': 'Progress updated successfully',
@@ -168,15 +290,36 @@ def unenroll(course_id):
         from flask import request as req
         student_id = req.current_user['user_id']
         
-        result = enrollments_collection.delete_one({
+        removed = enrollments_collection.find_one_and_delete({
             'student_id': student_id,
             'course_id': course_id
-        })
+        }, {'progress': 1})
         
-        if result.deleted_count == 0:
+        if not removed:
             return jsonify({'message': 'Enrollment not found'}), 404
         
+        change_enrollment_counts({course_id: -1})
+        change_course_stats({course_id: enrollment_change(removed.get('progress'), -1)})
+        
         return jsonify({'message': 'Unenrolled successfully'}), 200
     
     except Exception as e:
         return jsonify({'message': str(e)}), 500
+
+@enrollment_bp.route('/analytics/courses', methods=['GET'])
+@role_required('Instructor', 'Admin')
+def get_analytics():
+    """Get enrollment count, average progress and completion rate per course (Instructor/Admin only)"""
+    try:
+        from flask import request as req
+        if req.current_user['role'] == 'Instructor':
+            instructor_id = req.current_user['user_id']
+        else:
+            instructor_id = request.args.get('instructor_id')
+        
+        courses, totals = get_course_analytics(instructor_id)
+        
+        return jsonify({'courses': courses, 'totals': totals}), 200
+    
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
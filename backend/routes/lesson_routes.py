@@ -5,45 +5,66 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
 from datetime import datetime
+from pymongo import UpdateOne
 from middleware.auth_middleware import token_required, role_required
-from utils.database import lessons_collection, courses_collection
+from utils.database import lessons_collection, courses_collection, enrollments_collection
+from utils.pagination import paginate, keyset_filter, has_page_params
+from utils.updates import update_fields
+from utils.projection import get_projection, LESSON_UPDATE_FIELDS, LESSON_FIELDS, LESSON_SUMMARY_EXCLUDE
+from utils.catalog_cache import get_cached_course, get_course_lessons, invalidate_course
+from utils.conditional import make_etag, is_not_modified, not_modified, set_validators
 
 lesson_bp = Blueprint('lesson', __name__, url_prefix='/api')
 
+# Course fields returned alongside a single lesson
+COURSE_SUMMARY_PROJECTION = {'title': 1, 'instructor_id': 1, 'category': 1, 'level': 1, 'is_published': 1}
+MAX_BULK_LESSONS = 500
+
+def build_lesson(course_id, data, default_order=0):
+    """Build a lesson document from request data"""
+    return {
+        'course_id': course_id,
+        'title': data.get('title'),
+        'content': data.get('content', ''),
+        'lesson_type': data.get('lesson_type', 'text'),  # 'text' or 'video'
+        'video_url': data.get('video_url', ''),
+        'order': data.get('order', default_order),
+        'duration': data.get('duration', 0),
+        'created_at': datetime.utcnow(),
+        'updated_at': datetime.utcnow()
+    }
+
+def check_course_owner(course_id, message):
+    """Return an error response unless the current user may edit the course, else None"""
+    from flask import request as req
+    course = courses_collection.find_one({'_id': ObjectId(course_id)}, {'instructor_id': 1})
+    if not course:
+        return jsonify({'message': 'Course not found'}), 404
+    
+    if course['instructor_id'] != req.current_user['user_id'] and req.current_user['role'] != 'Admin':
+        return jsonify({'message': message}), 403
+    
+    return None
+
 @lesson_bp.route('/courses/<course_id>/lessons', methods=['POST'])
 @role_required('Admin', 'Instructor')
 def create_lesson(course_id):
     """Create a lesson for a course (Admin/Instructor only)"""
     try:
-        from flask import request as req
-        user_id = req.current_user['user_id']
         data = request.get_json()
         
-        # Verify course exists and user has permission
-        course = courses_collection.find_one({'_id': ObjectId(course_id)})
-        if not course:
-            return jsonify({'message': 'Course not found'}), 404
+        error = check_course_owner(course_id, 'You can only add lessons to your own courses')
+        if error:
+            return error
         
-        if course['instructor_id'] != user_id and req.current_user['role'] != 'Admin':
-            return jsonify({'message': 'You can only add lessons to your own courses'}), 403
-        
-        lesson = {
-            'course_id': course_id,
-            'title': data.get('title'),
-            'content': data.get('content', ''),
-            'lesson_type': data.get('lesson_type', 'text'),  # 'text' or 'video'
-            'video_url': data.get('video_url', ''),
-            'order': data.get('order', 0),
-            'duration': data.get('duration', 0),
-            'created_at': datetime.utcnow(),
-            'updated_at': datetime.utcnow()
-        }
+        lesson = build_lesson(course_id, data)
         
         if not lesson['title']:
             return jsonify({'message': 'Title is required'}), 400
         
         result = lessons_collection.insert_one(lesson)
         lesson['_id'] = str(result.inserted_id)
+        touch_course(course_id, lesson_delta=1)
         
         return jsonify({
             'message': 'Lesson created successfully',
@@ -53,22 +74,205 @@ def create_lesson(course_id):
     except Exception as e:
         return jsonify({'message': str(e)}), 500
 
+@lesson_bp.route('/courses/<course_id>/lessons/bulk', methods=['POST'])
+@role_required('Admin', 'Instructor')
+def create_lessons_bulk(course_id):
+    """Create many lessons for a course in one insert (Admin/Instructor only)
+
+    Lessons without an order are numbered by their position in the list,
+    after the highest order the course already has.
+    """
+    try:
+        data = request.get_json()
+        items = data.get('lessons') if isinstance(data, dict) else None
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({'message': 'lessons must be a non-empty list'}), 400
+        
+        if len(items) > MAX_BULK_LESSONS:
+            return jsonify({'message': f'At most {MAX_BULK_LESSONS} lessons per request'}), 400
+        
+        error = check_course_owner(course_id, 'You can only add lessons to your own courses')
+        if error:
+            return error
+        
+        last = lessons_collection.find_one({'course_id': course_id}, {'order': 1}, sort=[('order', -1)])
+        last_order = (last.get('order') or 0) if last else 0
+        
+        lessons = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not item.get('title'):
+                return jsonify({'message': f'Title is required (lesson {index})'}), 400
+            lessons.append(build_lesson(course_id, item, default_order=last_order + index + 1))
+        
+        lessons_collection.insert_many(lessons)
+        touch_course(course_id, lesson_delta=len(lessons))
+        
+        return jsonify({
+            'message': f'{len(lessons)} lessons created successfully',
+            'lessons': lessons
+        }), 201
+    
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@lesson_bp.route('/courses/<course_id>/lessons/order', methods=['PATCH'])
+@role_required('Admin', 'Instructor')
+def reorder_lessons(course_id):
+    """Apply a complete new lesson order with one bulk write (Admin/Instructor only)
+
+    Expects {"lesson_ids": [...]} listing every lesson of the course; the
+    lesson at position i gets order i + 1.
+    """
+    try:
+        data = request.get_json()
+        lesson_ids = data.get('lesson_ids') if isinstance(data, dict) else None
+        
+        if not isinstance(lesson_ids, list) or not lesson_ids:
+            return jsonify({'message': 'lesson_ids must be a non-empty list'}), 400
+        
+        if not all(isinstance(lesson_id, str) for lesson_id in lesson_ids):
+            return jsonify({'message': 'lesson_ids must be a list of lesson id strings'}), 400
+        
+        error = check_course_owner(course_id, 'You can only reorder lessons in your own courses')
+        if error:
+            return error
+        
+        current_ids = {str(lesson['_id']) for lesson in lessons_collection.find({'course_id': course_id}, {'_id': 1})}
+        if len(lesson_ids) != len(set(lesson_ids)) or set(lesson_ids) != current_ids:
+            return jsonify({'message': 'lesson_ids must list every lesson of the course exactly once'}), 400
+        
+        now = datetime.utcnow()
+        lessons_collection.bulk_write([
+            UpdateOne(
+                {'_id': ObjectId(lesson_id), 'course_id': course_id},
+                {'$set': {'order': index + 1, 'updated_at': now}}
+            )
+            for index, lesson_id in enumerate(lesson_ids)
+        ], ordered=False)
+        touch_course(course_id)
+        
+        return jsonify({
+            'message': 'Lessons reordered successfully',
+            'lessons': [{'_id': lesson_id, 'order': index + 1} for index, lesson_id in enumerate(lesson_ids)]
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
 @lesson_bp.route('/courses/<course_id>/lessons', methods=['GET'])
 @token_required
 def get_lessons(course_id):
-    """Get all lessons for a course"""
+    """Get all lessons for a course (supports pagination, ?fields= and ?view=summary)"""
     try:
         # Verify course exists
-        course = courses_collection.find_one({'_id': ObjectId(course_id)})
+        course = get_cached_course(course_id)
         if not course:
             return jsonify({'message': 'Course not found'}), 404
         
-        lessons = list(lessons_collection.find({'course_id': course_id}).sort('order', 1))
+        etag = make_etag(course_id, 'lessons', course.get('updated_at'))
+        if is_not_modified(etag, course.get('updated_at')):
+            return not_modified(etag, course.get('updated_at'))
+        
+        projection = get_projection(LESSON_FIELDS, LESSON_SUMMARY_EXCLUDE)
+        if has_page_params():
+            lessons, next_cursor = paginate(
+                lessons_collection,
+                {'course_id': course_id},
+                sort_keys=('order', '_id'),
+                projection=projection
+            )
+        else:
+            lessons = get_course_lessons(course, projection)
+            next_cursor = None
+        
+        response = jsonify({'lessons': lessons, 'next_cursor': next_cursor})
+        return set_validators(response, etag, course.get('updated_at')), 200
+    
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+@lesson_bp.route('/courses/<course_id>/lessons/<lesson_id>', methods=['GET'])
+@token_required
+def get_course_lesson(course_id, lesson_id):
+    """Get a single lesson of a course including its full content"""
+    try:
+        lesson = lessons_collection.find_one({'_id': ObjectId(lesson_id), 'course_id': course_id})
+        
+        if not lesson:
+            return jsonify({'message': 'Lesson not found'}), 404
+        
+        return jsonify({'lesson': lesson}), 200
+    
+    except Exception as e:
+        return jsonify({'message': str(e)}), 500
+
+def touch_course(course_id, lesson_delta=0):
+    """Bump a course's updated_at after one of its lessons changed, and drop its cached copies
+
+    lesson_delta is added to the course's lesson_count in the same write.
+    """
+    update = {'$set': {'updated_at': datetime.utcnow()}}
+    if lesson_delta:
+        update['$inc'] = {'lesson_count': lesson_delta}
+    courses_collection.update_one({'_id': ObjectId(course_id)}, update)
+    invalidate_course(course_id)
+
+def get_adjacent_lesson_id(lesson, direction):
+    """Get the id of the lesson before (-1) or after (1) lesson by (order, _id)
+
+    Lessons without an order are stepped through by _id alone, among the
+    other lessons without one.
+    """
+    if lesson.get('order') is None:
+        sort_keys = ['_id']
+        scope = {'course_id': lesson['course_id'], 'order': None}
+    else:
+        sort_keys = ['order', '_id']
+        scope = {'course_id': lesson['course_id']}
+    operator = '$gt' if direction > 0 else '$lt'
+    query = {'$and': [scope, keyset_filter(sort_keys, [lesson.get(key) for key in sort_keys], operator)]}
+    
+    adjacent = list(
+        lessons_collection.find(query, {'_id': 1})
+        .sort([(key, direction) for key in sort_keys])
+        .limit(1)
+    )
+    return str(adjacent[0]['_id']) if adjacent else None
+
+@lesson_bp.route('/lessons/<lesson_id>', methods=['GET'])
+@token_required
+def get_lesson(lesson_id):
+    """Get a lesson with its course summary, neighbouring lessons and the caller's progress"""
+    try:
+        from flask import request as req
+        lesson = lessons_collection.find_one({'_id': ObjectId(lesson_id)})
+        
+        if not lesson:
+            return jsonify({'message': 'Lesson not found'}), 404
+        
+        course = courses_collection.find_one({'_id': ObjectId(lesson['course_id'])}, dict(COURSE_SUMMARY_PROJECTION))
+        
+        # Previous/next lessons are single-document range scans on the course_id/order index
+        previous_lesson_id = get_adjacent_lesson_id(lesson, -1)
+        next_lesson_id = get_adjacent_lesson_id(lesson, 1)
         
-        for lesson in lessons:
-            lesson['_id'] = str(lesson['_id'])
+        enrollment = None
+        if req.current_user['role'] == 'Student':
+            enrollment = enrollments_collection.find_one(
+                {'student_id': req.current_user['user_id'], 'course_id': lesson['course_id']},
+                {'progress': 1, 'completed_lessons': 1}
+            )
         
-        return jsonify({'lessons': lessons}), 200
+        return jsonify({
+            'lesson': lesson,
+            'course': course,
+            'previous_lesson_id': previous_lesson_id,
+            'next_lesson_id': next_lesson_id,
+            'enrollment': enrollment
+        }), 200
     
     except Exception as e:
         return jsonify({'message': str(e)}), 500
@@ -82,34 +286,23 @@ def update_lesson(lesson_id):
         user_id = req.current_user['user_id']
         data = request.get_json()
         
-        lesson = lessons_collection.find_one({'_id': ObjectId(lesson_id)})
+        lesson = lessons_collection.find_one({'_id': ObjectId(lesson_id)}, {'course_id': 1})
         
         if not lesson:
             return jsonify({'message': 'Lesson not found'}), 404
         
         # Verify course ownership
-        course = courses_collection.find_one({'_id': ObjectId(lesson['course_id'])})
-        if course['instructor_id'] != user_id and req.current_user['role'] != 'Admin':
-            return jsonify({'message': 'You can only update lessons in your own courses'}), 403
-        
-        update_data = {
-            'title': data.get('title', lesson.get('title')),
-            'content': data.get('content', lesson.get('content', '')),
-            'lesson_type': data.get('lesson_type', lesson.get('lesson_type', 'text')),
-            'video_url': data.get('video_url', lesson.get('video_url', '')),
-            'order': data.get('order', lesson.get('order', 0)),
-            'duration': data.get('duration', lesson.get('duration', 0)),
-            'updated_at': datetime.utcnow()
-        }
-        
-        lessons_collection.update_one(
-            {'_id': ObjectId(lesson_id)},
-            {'$set': update_data}
-        )
-        
-        updated_lesson = lessons_collection.find_one({'_id': ObjectId(lesson_id)})
-        updated_lesson['_id'] = str(updated_lesson['_id'])
+        if req.current_user['role'] != 'Admin':
+            course = courses_collection.find_one({'_id': ObjectId(lesson['course_id'])}, {'instructor_id': 1})
+            if not course or course['instructor_id'] != user_id:
+                return jsonify({'message': 'You can only update lessons in your own courses'}), 403
+        
+        updated_lesson = update_fields(lessons_collection, {'_id': lesson['_id']}, data, LESSON_UPDATE_FIELDS)
+        
+        if not updated_lesson:
+            return jsonify({'message': 'Lesson not found'}), 404
         
+        touch_course(updated_lesson['course_id'])
         return jsonify({
             'message': 'Lesson updated successfully',
             'lesson': updated_lesson
@@ -137,6 +330,7 @@ def delete_lesson(lesson_id):
             return jsonify({'message': 'You can only delete lessons in your own courses'}), 403
         
         lessons_collection.delete_one({'_id': ObjectId(lesson_id)})
+        touch_course(lesson['course_id'], lesson_delta=-1)
         
         return jsonify({'message': 'Lesson deleted successfully'}), 200
     
@@ -4,12 +4,17 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime
 from middleware.auth_middleware import token_required
 from utils.database import profiles_collection
+from utils.updates import update_fields
+from utils.conditional import make_etag, is_not_modified, not_modified, set_validators
 
 profile_bp = Blueprint('profile', __name__, url_prefix='/api/profile')
 
+PROFILE_UPDATE_FIELDS = ('first_name', 'last_name', 'bio', 'phone', 'address')
+
 @profile_bp.route('', methods=['POST'])
 @token_required
 def create_profile():
@@ -35,7 +40,10 @@ def create_profile():
             'updated_at': datetime.utcnow()
         }
         
-        result = profiles_collection.insert_one(profile)
+        try:
+            result = profiles_collection.insert_one(profile)
+        except DuplicateKeyError:
+            return jsonify({'message': 'Profile already exists'}), 400
         profile['_id'] = str(result.inserted_id)
         
         return jsonify({
@@ -59,9 +67,11 @@ def get_profile():
         if not profile:
             return jsonify({'message': 'Profile not found'}), 404
         
-        profile['_id'] = str(profile['_id'])
+        etag = make_etag(profile['_id'], profile.get('updated_at'))
+        if is_not_modified(etag, profile.get('updated_at')):
+            return not_modified(etag, profile.get('updated_at'))
         
-        return jsonify({'profile': profile}), 200
+        return set_validators(jsonify({'profile': profile}), etag, profile.get('updated_at')), 200
     
     except Exception as e:
         return jsonify({'message': str(e)}), 500
@@ -75,28 +85,11 @@ def update_profile():
         user_id = req.current_user['user_id']
         data = request.get_json()
         
-        profile = profiles_collection.find_one({'user_id': user_id})
+        updated_profile = update_fields(profiles_collection, {'user_id': user_id}, data, PROFILE_UPDATE_FIELDS)
         
-        if not profile:
+        if not updated_profile:
             return jsonify({'message': 'Profile not found'}), 404
         
-        update_data = {
-            'first_name': data.get('first_name', profile.get('first_name', '')),
-            'last_name': data.get('last_name', profile.get('last_name', '')),
-            'bio': data.get('bio', profile.get('bio', '')),
-            'phone': data.get('phone', profile.get('phone', '')),
-            'address': data.get('address', profile.get('address', '')),
-            'updated_at': datetime.utcnow()
-        }
-        
-        profiles_collection.update_one(
-            {'user_id': user_id},
-            {'$set': update_data}
-        )
-        
-        updated_profile = profiles_collection.find_one({'user_id': user_id})
-        updated_profile['_id'] = str(updated_profile['_id'])
-        
         return jsonify({
             'message': 'Profile updated successfully',
             'profile': updated_profile
@@ -9,6 +9,9 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from models.user import User
 from utils.database import courses_collection, lessons_collection, enrollments_collection
+from utils.search import get_search_terms
+from utils.catalog import change_enrollment_counts
+from utils.course_stats import reconcile_course_stats
 from bson import ObjectId
 from datetime import datetime
 
@@ -40,6 +43,8 @@ def seed_data():
             'duration': 10,
             'level': 'Beginner',
             'is_published': True,
+            'enrollment_count': 0,
+            'lesson_count': 3,
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow()
         }
@@ -53,10 +58,16 @@ def seed_data():
             'duration': 20,
             'level': 'Advanced',
             'is_published': True,
+            'enrollment_count': 0,
+            'lesson_count': 2,
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow()
         }
         
+        # Prefix search matches on search_terms
+        for course in (course1, course2):
+            course['search_terms'] = get_search_terms(course)
+        
         result1 = courses_collection.insert_one(course1)
         result2 = courses_collection.insert_one(course2)
         
@@ -146,8 +157,12 @@ def seed_data():
                 'updated_at': datetime.utcnow()
             }
             enrollments_collection.insert_one(enrollment)
+            change_enrollment_counts({course1_id: 1})
             print(f"Created enrollment for student: {student['email']}")
     
+    # Instructor analytics read course_stats, which the seed does not maintain itself
+    reconcile_course_stats()
+    
     print("\nDatabase seeding completed!")
     print("\nSample users created:")
     print("  Admin: admin@lms.com / admin123")
@@ -0,0 +1,77 @@
+"""
+Production server for the LMS API (gunicorn)
+  python serve.py
+
+WEB_WORKER_MODEL selects how requests run:
+  processes  WEB_WORKERS single-threaded worker processes (default)
+  threads    WEB_WORKERS processes with WEB_THREADS threads each
+  gevent     WEB_WORKERS processes serving up to WEB_WORKER_CONNECTIONS
+             requests each on greenlets (needs the gevent package)
+
+The app is loaded once in the master and forked into the workers (except
+with gevent, which must patch the standard library before the app imports
+it). Every worker opens its own MongoDB connection pool on first use.
+Workers share their /metrics counters through METRICS_DIR, a fresh
+temporary directory per server run unless set.
+Use `python app.py` for the development server.
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from gunicorn.app.base import BaseApplication
+from config import Config
+
+WORKER_CLASSES = {
+    'processes': 'sync',
+    'threads': 'gthread',
+    'gevent': 'gevent'
+}
+
+def get_options():
+    """gunicorn settings built from Config"""
+    if Config.WEB_WORKER_MODEL not in WORKER_CLASSES:
+        raise ValueError(f"WEB_WORKER_MODEL must be one of: {', '.join(WORKER_CLASSES)}")
+
+    options = {
+        'bind': f"0.0.0.0:{os.getenv('PORT', 5000)}",
+        'workers': Config.WEB_WORKERS,
+        'worker_class': WORKER_CLASSES[Config.WEB_WORKER_MODEL],
+        'timeout': Config.WEB_TIMEOUT_SECONDS,
+        'preload_app': Config.WEB_WORKER_MODEL != 'gevent'
+    }
+    if Config.WEB_WORKER_MODEL == 'threads':
+        options['threads'] = Config.WEB_THREADS
+    if Config.WEB_WORKER_MODEL == 'gevent':
+        options['worker_connections'] = Config.WEB_WORKER_CONNECTIONS
+    return options
+
+class LMSServer(BaseApplication):
+    """Runs the Flask app under gunicorn with options from Config"""
+
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app import app
+        from utils.database import close_client
+
+        # Connections opened while loading (index creation) must not leak into forked workers
+        close_client()
+        return app
+
+if __name__ == '__main__':
+    # Set before the workers fork so they all write to the same directory
+    if Config.METRICS_DIR:
+        from utils.metrics import clear_metrics_dir
+        clear_metrics_dir()
+    else:
+        Config.METRICS_DIR = tempfile.mkdtemp(prefix='lms-metrics-')
+    LMSServer(get_options()).run()
@@ -4,17 +4,111 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import jwt
 import bcrypt
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 from config import Config
 from flask import jsonify
 
+class HashPoolBusy(Exception):
+    """Raised when too many password hashes are already queued"""
+    pass
+
+_hash_pool = None
+_hash_pool_pid = None
+_hash_pool_lock = threading.Lock()
+_hash_pending = 0
+_hash_rejected = 0
+
+def _bcrypt_hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def _bcrypt_check(password, hashed):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+def _get_hash_pool():
+    """Create the hashing pool lazily, once per process (safe across fork)"""
+    global _hash_pool, _hash_pool_pid
+    if _hash_pool is None or _hash_pool_pid != os.getpid():
+        _hash_pool = ProcessPoolExecutor(max_workers=Config.HASH_POOL_SIZE)
+        _hash_pool_pid = os.getpid()
+    return _hash_pool
+
+def _release_hash_slot(future=None):
+    global _hash_pending
+    with _hash_pool_lock:
+        _hash_pending -= 1
+
+def _run_hashing(fn, *args):
+    """Run fn on the hashing pool, failing fast with HashPoolBusy when saturated"""
+    global _hash_pending, _hash_rejected
+    if Config.HASH_POOL_SIZE <= 0:
+        return fn(*args)
+    
+    with _hash_pool_lock:
+        if _hash_pending >= Config.HASH_QUEUE_LIMIT:
+            _hash_rejected += 1
+            raise HashPoolBusy()
+        _hash_pending += 1
+        pool = _get_hash_pool()
+    
+    try:
+        future = pool.submit(fn, *args)
+    except Exception:
+        _release_hash_slot()
+        raise
+    
+    # The slot is held until the job really finishes, even after a timeout,
+    # so the queue limit still counts jobs the pool is busy with
+    future.add_done_callback(_release_hash_slot)
+    try:
+        return future.result(timeout=Config.HASH_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        raise HashPoolBusy()
+
+def shutdown_hash_pool():
+    """Stop the hashing pool; it is recreated on next use"""
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None and _hash_pool_pid == os.getpid():
+            _hash_pool.shutdown(wait=True)
+        _hash_pool = None
+
+def get_hash_pool_stats():
+    """Return hashing pool size, queue depth and rejection count"""
+    with _hash_pool_lock:
+        return {
+            'size': Config.HASH_POOL_SIZE,
+            'queue_limit': Config.HASH_QUEUE_LIMIT,
+            'pending': _hash_pending,
+            'rejected': _hash_rejected
+        }
+
 def hash_password(password):
     """Hash a password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return _run_hashing(_bcrypt_hash, password, Config.BCRYPT_ROUNDS)
+
+def hash_passwords(passwords, executor=None):
+    """Hash many passwords for a bulk import, in parallel on executor when given
+
+    Never runs on the login/register pool: an import would queue thousands
+    of jobs in front of every login on the worker.
+    """
+    passwords = list(passwords)
+    if executor is None:
+        return [_bcrypt_hash(password, Config.BCRYPT_ROUNDS) for password in passwords]
+    return list(executor.map(_bcrypt_hash, passwords, [Config.BCRYPT_ROUNDS] * len(passwords)))
 
 def verify_password(password, hashed):
     """Verify a password against its hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+    return _run_hashing(_bcrypt_check, password, hashed)
+
+def needs_rehash(hashed):
+    """Check whether a hash was made with a different cost than BCRYPT_ROUNDS"""
+    try:
+        return int(hashed.split('$')[2]) != Config.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
 
 def generate_token(user_id, role):
     """Generate JWT token"""
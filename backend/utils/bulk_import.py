@@ -0,0 +1,229 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io
+import csv
+import json
+from collections import Counter
+from datetime import datetime
+from bson import ObjectId
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+from utils.auth import hash_passwords
+from utils.catalog import change_enrollment_counts
+from utils.course_stats import change_course_stats, enrollment_change
+from utils.database import users_collection, profiles_collection, courses_collection, enrollments_collection
+
+VALID_ROLES = ('Admin', 'Instructor', 'Student')
+MAX_REPORTED_ERRORS = 1000
+DUPLICATE_KEY = 11000
+
+def parse_rows(stream, file_format):
+    """Yield (row_number, row) pairs from a binary CSV or NDJSON stream without loading it whole
+
+    CSV columns: email, password, role, first_name, last_name, course_ids
+    (course_ids separated by ';'). NDJSON objects use the same keys and may
+    give course_ids as a list. Unparseable lines yield (row_number, None).
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+
+    if file_format == 'csv':
+        for row_number, row in enumerate(csv.DictReader(text), start=1):
+            yield row_number, row
+        return
+
+    for row_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row_number, row if isinstance(row, dict) else None
+
+def _course_ids(value):
+    if isinstance(value, list):
+        return [str(course_id).strip() for course_id in value if str(course_id).strip()]
+    return [course_id.strip() for course_id in (value or '').split(';') if course_id.strip()]
+
+def _bulk_write(collection, operations):
+    """Run an unordered bulk_write; return (inserted, {operation index: error code})"""
+    if not operations:
+        return 0, {}
+    try:
+        result = collection.bulk_write(operations, ordered=False)
+        return result.inserted_count, {}
+    except BulkWriteError as e:
+        failed = {error['index']: error['code'] for error in e.details['writeErrors']}
+        return e.details['nInserted'], failed
+
+class BulkImporter:
+    """Import users, profiles and enrollments in batches of unordered bulk writes
+
+    New passwords are hashed on hash_executor (a process pool owned by the
+    caller), or one by one on the calling thread when it is None.
+    """
+
+    def __init__(self, batch_size, hash_executor=None):
+        self.batch_size = batch_size
+        self.hash_executor = hash_executor
+        self.known_courses = {}
+        self.seen_emails = set()
+        self.summary = {
+            'rows': 0,
+            'users_created': 0,
+            'users_existing': 0,
+            'profiles_created': 0,
+            'enrollments_created': 0,
+            'enrollments_existing': 0,
+            'error_count': 0,
+            'errors': []
+        }
+
+    def error(self, row_number, message):
+        self.summary['error_count'] += 1
+        if len(self.summary['errors']) < MAX_REPORTED_ERRORS:
+            self.summary['errors'].append({'row': row_number, 'message': message})
+
+    def run(self, rows):
+        """Import all rows and return the summary"""
+        batch = []
+        for row_number, row in rows:
+            self.summary['rows'] += 1
+            batch.append((row_number, row))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        return self.summary
+
+    def validate(self, batch):
+        """Drop invalid rows, recording an error for each"""
+        valid = []
+        for row_number, row in batch:
+            if row is None:
+                self.error(row_number, 'Malformed row')
+                continue
+
+            email = (row.get('email') or '').strip()
+            role = (row.get('role') or 'Student').strip()
+            course_ids = _course_ids(row.get('course_ids'))
+
+            if not email:
+                self.error(row_number, 'Email is required')
+            elif email in self.seen_emails:
+                self.error(row_number, 'Duplicate email in file')
+            elif role not in VALID_ROLES:
+                self.error(row_number, 'Invalid role')
+            elif course_ids and role != 'Student':
+                self.error(row_number, 'Only students can be enrolled')
+            else:
+                self.seen_emails.add(email)
+                valid.append((row_number, row, email, role, course_ids))
+        return valid
+
+    def load_courses(self, course_ids):
+        """Remember which course ids exist, with one query for the unknown ones"""
+        unknown = {course_id for course_id in course_ids if course_id not in self.known_courses}
+        object_ids = [ObjectId(course_id) for course_id in unknown if ObjectId.is_valid(course_id)]
+        found = {str(course['_id']) for course in courses_collection.find({'_id': {'$in': object_ids}}, {'_id': 1})}
+        for course_id in unknown:
+            self.known_courses[course_id] = course_id in found
+
+    def import_batch(self, batch):
+        rows = self.validate(batch)
+        if not rows:
+            return
+
+        emails = [email for _, _, email, _, _ in rows]
+        existing, existing_roles = {}, {}
+        for user in users_collection.find({'email': {'$in': emails}}, {'email': 1, 'role': 1}):
+            existing[user['email']] = str(user['_id'])
+            existing_roles[user['email']] = user.get('role')
+
+        new_rows = [entry for entry in rows if entry[2] not in existing]
+        missing_password = [entry for entry in new_rows if not entry[1].get('password')]
+        for row_number, *_ in missing_password:
+            self.error(row_number, 'Password is required for new users')
+        new_rows = [entry for entry in new_rows if entry[1].get('password')]
+
+        # Hash every new password of the batch in parallel
+        hashes = hash_passwords((str(row.get('password')) for _, row, _, _, _ in new_rows), self.hash_executor)
+
+        now = datetime.utcnow()
+        user_ids = dict(existing)
+        user_ops, profile_ops, op_rows = [], [], []
+        for (row_number, row, email, role, _), hashed in zip(new_rows, hashes):
+            user_id = ObjectId()
+            user_ops.append(InsertOne({
+                '_id': user_id,
+                'email': email,
+                'password': hashed,
+                'role': role,
+                'created_at': now,
+                'updated_at': now
+            }))
+            op_rows.append((row_number, email, row, user_id))
+
+        inserted, failed = _bulk_write(users_collection, user_ops)
+        self.summary['users_created'] += inserted
+        self.summary['users_existing'] += len(existing)
+
+        for index, (row_number, email, row, user_id) in enumerate(op_rows):
+            if index in failed:
+                message = 'User already exists' if failed[index] == DUPLICATE_KEY else 'Could not create user'
+                self.error(row_number, message)
+                continue
+            user_ids[email] = str(user_id)
+            if row.get('first_name') or row.get('last_name'):
+                profile_ops.append(InsertOne({
+                    'user_id': str(user_id),
+                    'first_name': row.get('first_name', ''),
+                    'last_name': row.get('last_name', ''),
+                    'bio': '',
+                    'phone': '',
+                    'address': '',
+                    'created_at': now,
+                    'updated_at': now
+                }))
+
+        inserted, _ = _bulk_write(profiles_collection, profile_ops)
+        self.summary['profiles_created'] += inserted
+
+        self.load_courses({course_id for *_, course_ids in rows for course_id in course_ids})
+
+        enrollment_ops, enrollment_rows = [], []
+        for row_number, _, email, _, course_ids in rows:
+            if email not in user_ids or not course_ids:
+                continue
+            # The row's role was checked in validate; an existing account keeps its stored role
+            if existing_roles.get(email, 'Student') != 'Student':
+                self.error(row_number, f'Only students can be enrolled (existing account is {existing_roles[email]})')
+                continue
+            for course_id in course_ids:
+                if not self.known_courses.get(course_id):
+                    self.error(row_number, f'Course not found: {course_id}')
+                    continue
+                enrollment_ops.append(InsertOne({
+                    'student_id': user_ids[email],
+                    'course_id': course_id,
+                    'progress': 0,
+                    'completed_lessons': [],
+                    'enrolled_at': now,
+                    'updated_at': now
+                }))
+                enrollment_rows.append((row_number, course_id))
+
+        inserted, failed = _bulk_write(enrollments_collection, enrollment_ops)
+        for index, code in failed.items():
+            if code != DUPLICATE_KEY:
+                row_number, course_id = enrollment_rows[index]
+                self.error(row_number, f'Could not enroll in course {course_id}')
+
+        created = Counter(course_id for index, (_, course_id) in enumerate(enrollment_rows) if index not in failed)
+        change_enrollment_counts(created)
+        change_course_stats({course_id: enrollment_change(0, count) for course_id, count in created.items()})
+        self.summary['enrollments_created'] += inserted
+        self.summary['enrollments_existing'] += sum(1 for code in failed.values() if code == DUPLICATE_KEY)
@@ -0,0 +1,152 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from flask import request
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from utils.database import courses_collection, enrollments_collection
+from utils.catalog_cache import invalidate_popular_pages
+
+# ?sort= values -> (field, direction); ties are broken by _id in the same direction.
+# ObjectIds embed their creation time, so _id order is creation order.
+CATALOG_SORTS = {
+    'oldest': ('_id', ASCENDING),
+    'newest': ('_id', DESCENDING),
+    'price': ('price', ASCENDING),
+    '-price': ('price', DESCENDING),
+    'duration': ('duration', ASCENDING),
+    '-duration': ('duration', DESCENDING),
+    'popular': ('enrollment_count', DESCENDING)
+}
+DEFAULT_CATALOG_SORT = 'oldest'
+
+# Equality filters that lead a catalog index; each is combined with every sort field.
+# The empty prefix serves staff, who see every course unless they filter on is_published.
+CATALOG_INDEX_PREFIXES = [
+    (),
+    ('is_published',),
+    ('is_published', 'category'),
+    ('is_published', 'level')
+]
+
+def get_catalog_sort():
+    """Read ?sort= and return (sort_keys, direction) for paginate()"""
+    sort = request.args.get('sort', DEFAULT_CATALOG_SORT)
+    if sort not in CATALOG_SORTS:
+        raise ValueError(f"sort must be one of: {', '.join(CATALOG_SORTS)}")
+
+    field, direction = CATALOG_SORTS[sort]
+    sort_keys = ('_id',) if field == '_id' else (field, '_id')
+    return sort_keys, direction
+
+def _parse_number(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a number')
+
+def build_catalog_query(role):
+    """Translate the catalog filter parameters into a Mongo filter
+
+    ?category=, ?level=, ?instructor_id=, ?min_price=, ?max_price= and
+    ?published=true|false (Admin/Instructor only; students always get
+    published courses).
+    """
+    query = {}
+
+    published = request.args.get('published')
+    if role == 'Student':
+        query['is_published'] = True
+    elif published is not None:
+        if published not in ('true', 'false'):
+            raise ValueError('published must be true or false')
+        query['is_published'] = published == 'true'
+
+    for field in ('category', 'level', 'instructor_id'):
+        value = request.args.get(field)
+        if value:
+            query[field] = value
+
+    min_price = _parse_number('min_price')
+    max_price = _parse_number('max_price')
+    if min_price is not None or max_price is not None:
+        query['price'] = {}
+        if min_price is not None:
+            query['price']['$gte'] = min_price
+        if max_price is not None:
+            query['price']['$lte'] = max_price
+
+    return query
+
+def change_enrollment_counts(counts):
+    """Apply {course_id: delta} to the courses' enrollment_count
+
+    Only the ?sort=popular pages are retired: updated_at keeps meaning
+    "content changed", so course ETags, cached lessons and the other
+    catalog pages survive enrollment churn. They can because the count is
+    never part of a course response (see HIDDEN_COURSE_FIELDS), only of
+    the order of popular pages.
+    """
+    operations = [
+        UpdateOne({'_id': ObjectId(course_id)}, {'$inc': {'enrollment_count': delta}})
+        for course_id, delta in counts.items() if delta
+    ]
+    if operations:
+        courses_collection.bulk_write(operations, ordered=False)
+        invalidate_popular_pages()
+
+def fill_missing_enrollment_counts(batch_size=1000):
+    """Count enrollments for courses that have no enrollment_count yet; return how many were filled
+
+    Runs at startup: ?sort=popular pages by keyset on enrollment_count, and
+    courses created before the field existed would drop out after the first
+    page. Courses that already have a count are left alone.
+    """
+    missing = [str(course['_id']) for course in courses_collection.find({'enrollment_count': None}, {'_id': 1})]
+
+    filled = 0
+    for start in range(0, len(missing), batch_size):
+        course_ids = missing[start:start + batch_size]
+        counts = {
+            group['_id']: group['count']
+            for group in enrollments_collection.aggregate([
+                {'$match': {'course_id': {'$in': course_ids}}},
+                {'$group': {'_id': '$course_id', 'count': {'$sum': 1}}}
+            ])
+        }
+        # Skip courses an enrollment $inc has reached in the meantime
+        operations = [
+            UpdateOne({'_id': ObjectId(course_id), 'enrollment_count': None},
+                      {'$set': {'enrollment_count': counts.get(course_id, 0)}})
+            for course_id in course_ids
+        ]
+        filled += courses_collection.bulk_write(operations, ordered=False).modified_count
+    if filled:
+        invalidate_popular_pages()
+    return filled
+
+def backfill_enrollment_counts(batch_size=1000):
+    """Recompute enrollment_count for every course from the enrollments collection"""
+    counts = {
+        group['_id']: group['count']
+        for group in enrollments_collection.aggregate([
+            {'$group': {'_id': '$course_id', 'count': {'$sum': 1}}}
+        ])
+    }
+
+    updated = 0
+    operations = []
+    for course in courses_collection.find({}, {'enrollment_count': 1}).batch_size(batch_size):
+        count = counts.get(str(course['_id']), 0)
+        if course.get('enrollment_count') != count:
+            operations.append(UpdateOne({'_id': course['_id']}, {'$set': {'enrollment_count': count}}))
+        if len(operations) >= batch_size:
+            updated += courses_collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        updated += courses_collection.bulk_write(operations, ordered=False).modified_count
+    return updated
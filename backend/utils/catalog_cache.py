@@ -0,0 +1,218 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import threading
+import bson
+from bson import ObjectId
+from config import Config
+from utils.cache import TTLCache
+from utils.database import courses_collection, lessons_collection
+from utils.metrics import register_cache
+from utils.projection import apply_projection, LESSON_SUMMARY_EXCLUDE
+from utils.search import HIDDEN_COURSE_FIELDS
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+class RedisCache:
+    """Cache backend shared by all workers, on Redis
+
+    Takes any client with the redis-py get/set/delete/incr API, so a local
+    stand-in such as fakeredis can replace the server in tests. Values are
+    BSON-encoded so ObjectId and datetime fields survive the round trip.
+    """
+
+    def __init__(self, client, ttl, prefix='lms:cache:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired"""
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return bson.decode(raw)['v']
+
+    def set(self, key, value):
+        """Store value under key for ttl seconds"""
+        if self.ttl > 0:
+            self.client.set(self.prefix + key, bson.encode({'v': value}), ex=self.ttl)
+
+    def delete(self, key):
+        """Remove key from the cache if present"""
+        self.client.delete(self.prefix + key)
+
+    def counter(self, key):
+        """Return the current value of a counter (0 if never incremented)"""
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def incr(self, key):
+        """Increment and return a counter shared by all workers"""
+        return self.client.incr(self.prefix + key)
+
+    def stats(self):
+        """Return hit/miss counters of this process"""
+        total = self.hits + self.misses
+        return {
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': (self.hits / total) if total else 0.0
+        }
+
+def create_backend(maxsize):
+    """Build the catalog cache backend selected by CATALOG_CACHE_BACKEND
+
+    maxsize bounds the in-process backend; Redis is bounded by its own
+    maxmemory setting.
+    """
+    if Config.CATALOG_CACHE_BACKEND == 'redis':
+        if redis is None:
+            raise RuntimeError('CATALOG_CACHE_BACKEND=redis requires the redis package')
+        return RedisCache(redis.Redis.from_url(Config.CATALOG_CACHE_URL), Config.CATALOG_CACHE_TTL_SECONDS)
+    return TTLCache(maxsize=maxsize, ttl=Config.CATALOG_CACHE_TTL_SECONDS)
+
+# Course documents and catalog pages. Course and lesson writes invalidate the
+# affected course and bump the catalog generation, which is part of every
+# page key. With the in-process backend other workers only see a write once
+# their entries expire; use the redis backend to share them.
+catalog_cache = create_backend(Config.CATALOG_CACHE_MAX_SIZE)
+
+# Lesson lists, kept apart because they carry full lesson content: a few
+# hundred courses of long lessons can take far more memory than the
+# thousands of small documents catalog_cache is sized for.
+lesson_cache = create_backend(Config.LESSON_CACHE_MAX_SIZE)
+
+CATALOG_GENERATION_KEY = 'catalog:generation'
+POPULARITY_GENERATION_KEY = 'catalog:popularity'
+
+_verify_lock = threading.Lock()
+_verify_stats = {'verified': 0, 'stale': 0}
+
+def _should_verify():
+    return random.random() < Config.CATALOG_CACHE_VERIFY_RATE
+
+def _record_verification(stale):
+    with _verify_lock:
+        _verify_stats['verified'] += 1
+        if stale:
+            _verify_stats['stale'] += 1
+
+def get_cached_course(course_id):
+    """Get a course document (internal fields hidden), served from cache when possible
+
+    Returns a copy that callers may add fields to, or None if there is no such course.
+    """
+    key = f'course:{course_id}'
+    course = catalog_cache.get(key)
+
+    # Re-check a sample of hits against Mongo to measure stale reads
+    if course is not None and _should_verify():
+        current = courses_collection.find_one({'_id': ObjectId(course_id)}, {'updated_at': 1})
+        stale = current is None or current.get('updated_at') != course.get('updated_at')
+        _record_verification(stale)
+        if stale:
+            course = None
+
+    if course is None:
+        course = courses_collection.find_one({'_id': ObjectId(course_id)}, dict(HIDDEN_COURSE_FIELDS))
+        if course is None:
+            return None
+        catalog_cache.set(key, course)
+
+    return dict(course)
+
+def get_cached_lessons(course, summary=False):
+    """Get every lesson of a course in (order, _id) order, served from cache when possible
+
+    summary=True leaves out the LESSON_SUMMARY_EXCLUDE fields, both in the
+    Mongo read and in the separately cached list. Entries are tagged with the
+    course's updated_at, which lesson writes bump, so a list cached before
+    the course document changed is never served.
+    """
+    course_id = str(course['_id'])
+    key = f'lessons:{course_id}:summary' if summary else f'lessons:{course_id}'
+    entry = lesson_cache.get(key)
+    if entry is not None and entry['updated_at'] == course.get('updated_at'):
+        return entry['lessons']
+
+    projection = {field: 0 for field in LESSON_SUMMARY_EXCLUDE} if summary else None
+    lessons = list(lessons_collection.find({'course_id': course_id}, projection).sort([('order', 1), ('_id', 1)]))
+    lesson_cache.set(key, {'updated_at': course.get('updated_at'), 'lessons': lessons})
+    return lessons
+
+def get_course_lessons(course, projection=None):
+    """Get a course's lessons with a get_projection() projection applied
+
+    Projections that do not ask for the heavy summary-excluded fields are
+    served from the summary list, so they never read lesson content.
+    """
+    full = projection is None or any(projection.get(field) for field in LESSON_SUMMARY_EXCLUDE)
+    return [apply_projection(lesson, projection) for lesson in get_cached_lessons(course, summary=not full)]
+
+def get_page_key(*parts):
+    """Build a catalog page key under the current catalog generation"""
+    generation = catalog_cache.counter(CATALOG_GENERATION_KEY)
+    return ':'.join(['catalog', str(generation)] + [str(part) for part in parts])
+
+def get_cached_page(key, current_version):
+    """Get a cached catalog page, or None
+
+    current_version is called on a sample of hits and compared with the
+    version stored with the page to measure stale reads.
+    """
+    page = catalog_cache.get(key)
+    if page is not None and _should_verify():
+        stale = page['version'] != list(current_version())
+        _record_verification(stale)
+        if stale:
+            catalog_cache.delete(key)
+            return None
+    return page
+
+def cache_page(key, version, page):
+    """Cache a catalog page along with the catalog version it was built from"""
+    catalog_cache.set(key, dict(page, version=list(version)))
+
+def invalidate_catalog():
+    """Retire every cached catalog page"""
+    catalog_cache.incr(CATALOG_GENERATION_KEY)
+
+def get_popularity_generation():
+    """Counter bumped by enrollment changes; part of ?sort=popular page keys and ETags"""
+    return catalog_cache.counter(POPULARITY_GENERATION_KEY)
+
+def invalidate_popular_pages():
+    """Retire the catalog pages ordered by enrollment_count"""
+    catalog_cache.incr(POPULARITY_GENERATION_KEY)
+
+def invalidate_course(course_id):
+    """Drop a course's document and lessons, and retire the catalog pages"""
+    catalog_cache.delete(f'course:{course_id}')
+    lesson_cache.delete(f'lessons:{course_id}')
+    lesson_cache.delete(f'lessons:{course_id}:summary')
+    invalidate_catalog()
+
+def get_catalog_cache_stats():
+    """Return hit/miss counters and sampled stale-read counts of the catalog cache"""
+    stats = catalog_cache.stats()
+    with _verify_lock:
+        verified, stale = _verify_stats['verified'], _verify_stats['stale']
+    stats.update({
+        'verified_reads': verified,
+        'stale_reads': stale,
+        'stale_ratio': (stale / verified) if verified else 0.0
+    })
+    return stats
+
+register_cache('catalog', get_catalog_cache_stats)
+register_cache('lessons', lesson_cache.stats)
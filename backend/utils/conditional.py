@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hashlib
+from datetime import timezone
+from flask import request, current_app
+
+# Compressed responses carry the ETag with an encoding suffix (see utils/compression.py)
+ETAG_ENCODING_SUFFIXES = ('', '-gzip', '-br')
+
+def make_etag(*parts):
+    """Build a strong ETag from document ids, timestamps and the query string"""
+    raw = '|'.join(str(part) for part in parts) + '|' + request.query_string.decode('utf-8')
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def _as_utc(value):
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.replace(microsecond=0)
+
+def is_not_modified(etag, last_modified=None):
+    """Check If-None-Match (preferred) or If-Modified-Since against the current version"""
+    if request.if_none_match:
+        return any(request.if_none_match.contains(etag + suffix) for suffix in ETAG_ENCODING_SUFFIXES)
+
+    if last_modified is not None and request.if_modified_since:
+        return _as_utc(last_modified) <= request.if_modified_since
+
+    return False
+
+def set_validators(response, etag, last_modified=None):
+    """Attach ETag, Last-Modified and revalidation headers to a response"""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _as_utc(last_modified)
+    # Responses are per-user (authenticated), so only private caches may keep them
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def not_modified(etag, last_modified=None):
+    """Build an empty 304 response"""
+    return set_validators(current_app.response_class(status=304), etag, last_modified)
@@ -0,0 +1,142 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from pymongo import UpdateOne, DeleteOne
+from utils.database import course_stats_collection, courses_collection, enrollments_collection
+
+# course_stats documents: {_id: course id, enrollments, progress_sum, completed, updated_at}.
+# Kept current with $inc by the enrollment routes; reconcile_course_stats()
+# rebuilds them from the enrollments collection.
+STAT_FIELDS = ('enrollments', 'progress_sum', 'completed')
+COMPLETED_PROGRESS = 100
+PROGRESS_TOLERANCE = 1e-6
+
+def is_completed(progress):
+    return (progress or 0) >= COMPLETED_PROGRESS
+
+def enrollment_change(progress, count=1):
+    """Stat deltas for adding count enrollments with this progress (a negative count removes them)"""
+    return {
+        'enrollments': count,
+        'progress_sum': count * (progress or 0),
+        'completed': count * int(is_completed(progress))
+    }
+
+def progress_change(before, after):
+    """Stat deltas for an enrollment whose progress went from before to after"""
+    return {
+        'progress_sum': (after or 0) - (before or 0),
+        'completed': int(is_completed(after)) - int(is_completed(before))
+    }
+
+def change_course_stats(changes):
+    """Apply {course_id: {field: delta}} to course_stats with atomic $inc upserts"""
+    now = datetime.utcnow()
+    operations = []
+    for course_id, deltas in changes.items():
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if deltas:
+            operations.append(UpdateOne({'_id': course_id}, {'$inc': deltas, '$set': {'updated_at': now}}, upsert=True))
+    if operations:
+        course_stats_collection.bulk_write(operations, ordered=False)
+
+def delete_course_stats(course_id):
+    course_stats_collection.delete_one({'_id': course_id})
+
+def summarize(stats):
+    """Enrollment count, average progress and completion rate from a course_stats document"""
+    enrollments = max(0, stats.get('enrollments', 0))
+    return {
+        'enrollments': enrollments,
+        'completed': max(0, stats.get('completed', 0)),
+        'average_progress': round(stats.get('progress_sum', 0) / enrollments, 2) if enrollments else 0.0,
+        'completion_rate': round(stats.get('completed', 0) / enrollments, 4) if enrollments else 0.0
+    }
+
+def get_course_stats(course_ids):
+    """course_stats documents of the given courses keyed by course id (empty for courses without any)"""
+    found = {stats['_id']: stats for stats in course_stats_collection.find({'_id': {'$in': list(course_ids)}})}
+    return {course_id: found.get(course_id, {}) for course_id in course_ids}
+
+def _differs(stats, expected):
+    return (
+        stats.get('enrollments', 0) != expected['enrollments']
+        or stats.get('completed', 0) != expected['completed']
+        or abs(stats.get('progress_sum', 0) - expected['progress_sum']) > PROGRESS_TOLERANCE
+    )
+
+def reconcile_course_stats(batch_size=1000):
+    """Rebuild course_stats from the enrollments collection; return the number of documents fixed
+
+    Can run while the API is serving, but converges over runs rather than
+    being exact. A correction is only written if the document still holds
+    the value read, so increments that land during the run are not
+    overwritten. The routes write an enrollment before its $inc, though:
+    if the aggregation sees an enrollment whose $inc has not run yet, the
+    correction already counts it and the late $inc counts it again (or
+    removes it twice for an unenroll). That drift is fixed by the next run,
+    so schedule the job periodically.
+    """
+    current = {stats['_id']: stats for stats in course_stats_collection.find()}
+    expected = {
+        group['_id']: {field: group[field] for field in STAT_FIELDS}
+        for group in enrollments_collection.aggregate([
+            {'$group': {
+                '_id': '$course_id',
+                'enrollments': {'$sum': 1},
+                'progress_sum': {'$sum': {'$ifNull': ['$progress', 0]}},
+                'completed': {'$sum': {'$cond': [{'$gte': ['$progress', COMPLETED_PROGRESS]}, 1, 0]}}
+            }}
+        ])
+    }
+
+    course_ids = {str(course['_id']) for course in courses_collection.find({}, {'_id': 1}).batch_size(batch_size)}
+    now = datetime.utcnow()
+    operations = []
+    for course_id in course_ids | set(current):
+        stats = current.get(course_id)
+        if course_id not in course_ids:
+            operations.append(DeleteOne({'_id': course_id}))
+            continue
+
+        values = expected.get(course_id, {'enrollments': 0, 'progress_sum': 0, 'completed': 0})
+        if stats is None:
+            if values['enrollments']:
+                operations.append(UpdateOne(
+                    {'_id': course_id}, {'$setOnInsert': dict(values, updated_at=now)}, upsert=True
+                ))
+        elif _differs(stats, values):
+            unchanged = {'_id': course_id, **{field: stats.get(field) for field in STAT_FIELDS}}
+            operations.append(UpdateOne(unchanged, {'$set': dict(values, updated_at=now)}))
+
+    fixed = 0
+    for start in range(0, len(operations), batch_size):
+        result = course_stats_collection.bulk_write(operations[start:start + batch_size], ordered=False)
+        fixed += result.modified_count + result.upserted_count + result.deleted_count
+    return fixed
+
+def get_instructor_courses(instructor_id=None):
+    """Courses (id, title, is_published) of one instructor, or of everyone when None"""
+    query = {'instructor_id': instructor_id} if instructor_id else {}
+    return list(courses_collection.find(query, {'title': 1, 'instructor_id': 1, 'is_published': 1}).sort('_id', 1))
+
+def get_course_analytics(instructor_id=None):
+    """Per-course analytics and totals for an instructor, read from course_stats in O(courses)"""
+    courses = get_instructor_courses(instructor_id)
+    stats = get_course_stats([str(course['_id']) for course in courses])
+    analytics = [
+        {
+            'course_id': str(course['_id']),
+            'title': course.get('title'),
+            'instructor_id': course.get('instructor_id'),
+            'is_published': course.get('is_published'),
+            **summarize(stats[str(course['_id'])])
+        }
+        for course in courses
+    ]
+
+    totals = summarize({field: sum(max(0, s.get(field, 0)) for s in stats.values()) for field in STAT_FIELDS})
+    totals['courses'] = len(analytics)
+    return analytics, totals
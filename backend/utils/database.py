@@ -2,15 +2,91 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import threading
 from pymongo import MongoClient
 from config import Config
+from utils.query_stats import command_listener
+from utils.metrics import pool_listener
 
-client = MongoClient(Config.MONGO_URI)
-db = client[Config.DATABASE_NAME]
+_client = None
+_client_pid = None
+_collections = {}
+_client_lock = threading.Lock()
+
+def get_client_options():
+    """MongoClient keyword arguments built from Config"""
+    options = {
+        'appname': Config.MONGO_APPNAME,
+        'maxPoolSize': Config.MONGO_MAX_POOL_SIZE,
+        'minPoolSize': Config.MONGO_MIN_POOL_SIZE,
+        'maxIdleTimeMS': Config.MONGO_MAX_IDLE_TIME_MS,
+        'waitQueueTimeoutMS': Config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        'connectTimeoutMS': Config.MONGO_CONNECT_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        'socketTimeoutMS': Config.MONGO_SOCKET_TIMEOUT_MS,
+        'event_listeners': [command_listener, pool_listener]
+    }
+    if Config.MONGO_COMPRESSORS:
+        options['compressors'] = Config.MONGO_COMPRESSORS
+    return options
+
+def get_client():
+    """Return this process's MongoClient, creating it on first use
+
+    A client inherited through fork() is never reused: its sockets and
+    monitor threads belong to the parent, so the child builds its own.
+    """
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _collections.clear()
+                _client = MongoClient(Config.MONGO_URI, **get_client_options())
+                _client_pid = os.getpid()
+    return _client
+
+def get_collection(name):
+    """Return a collection of the configured database on this process's client"""
+    client = get_client()
+    collection = _collections.get(name)
+    if collection is None:
+        collection = _collections[name] = client[Config.DATABASE_NAME][name]
+    return collection
+
+def close_client():
+    """Close this process's client, e.g. in a server master before forking workers"""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+        _collections.clear()
+
+class LazyDatabase:
+    """Stand-in for the Database object that connects on first use"""
+
+    def __getitem__(self, name):
+        return get_collection(name)
+
+    def __getattr__(self, name):
+        return getattr(get_client()[Config.DATABASE_NAME], name)
+
+class LazyCollection:
+    """Stand-in for a Collection object that connects on first use"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_collection(self.name), attr)
+
+db = LazyDatabase()
 
 # Collections
-users_collection = db['users']
-profiles_collection = db['profiles']
-courses_collection = db['courses']
-lessons_collection = db['lessons']
-enrollments_collection = db['enrollments']
+users_collection = LazyCollection('users')
+profiles_collection = LazyCollection('profiles')
+courses_collection = LazyCollection('courses')
+lessons_collection = LazyCollection('lessons')
+enrollments_collection = LazyCollection('enrollments')
+course_stats_collection = LazyCollection('course_stats')
@@ -0,0 +1,132 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from utils.database import db
+from utils.search import TEXT_INDEX_WEIGHTS
+from utils.catalog import CATALOG_SORTS, CATALOG_INDEX_PREFIXES
+
+def _catalog_indexes():
+    """One (filter prefix..., sort field, _id) index per catalog filter prefix and sort field
+
+    Indexes can be walked backwards, so one index serves both sort directions.
+    """
+    sort_fields = dict.fromkeys(field for field, _ in CATALOG_SORTS.values())
+    indexes = []
+    for prefix in CATALOG_INDEX_PREFIXES:
+        for field in sort_fields:
+            keys = list(prefix) + ([field, '_id'] if field != '_id' else ['_id'])
+            if keys == ['_id']:
+                continue  # the built-in _id index
+            name = 'catalog_' + '_'.join(list(prefix) + [field.strip('_')])
+            indexes.append(IndexModel([(key, ASCENDING) for key in keys], name=name))
+    return indexes
+
+# Declarative index registry: collection name -> indexes the routes rely on.
+# create_indexes is idempotent, so this can be applied on every start-up.
+INDEXES = {
+    'users': [
+        IndexModel([('email', ASCENDING)], name='email_unique', unique=True)
+    ],
+    'profiles': [
+        IndexModel([('user_id', ASCENDING)], name='user_id_unique', unique=True)
+    ],
+    'courses': [
+        IndexModel([('instructor_id', ASCENDING)], name='instructor_id'),
+        IndexModel([('updated_at', DESCENDING)], name='updated_at'),
+        IndexModel([(field, TEXT) for field in TEXT_INDEX_WEIGHTS], name='course_text', weights=TEXT_INDEX_WEIGHTS),
+        IndexModel([('search_terms', ASCENDING)], name='search_terms'),
+        *_catalog_indexes()
+    ],
+    'lessons': [
+        IndexModel([('course_id', ASCENDING), ('order', ASCENDING), ('_id', ASCENDING)], name='course_id_order')
+    ],
+    'enrollments': [
+        IndexModel([('student_id', ASCENDING), ('course_id', ASCENDING)], name='student_course_unique', unique=True),
+        IndexModel([('course_id', ASCENDING), ('_id', ASCENDING)], name='course_id')
+    ]
+}
+
+_SAMPLE_ID = str(ObjectId())
+
+# Query shapes issued by the routes: (description, collection, filter, sort)
+QUERY_SHAPES = [
+    ('login / register', 'users', {'email': 'user@lms.com'}, None),
+    ('token_required', 'users', {'_id': ObjectId(_SAMPLE_ID)}, None),
+    ('get_profile', 'profiles', {'user_id': _SAMPLE_ID}, None),
+    ('get_courses', 'courses', {}, [('_id', ASCENDING)]),
+    ('get_courses (published, newest)', 'courses', {'is_published': True}, [('_id', DESCENDING)]),
+    ('get_courses (category, price)', 'courses', {'is_published': True, 'category': 'Programming'}, [('price', ASCENDING), ('_id', ASCENDING)]),
+    ('get_courses (level, popular)', 'courses', {'is_published': True, 'level': 'Beginner'}, [('enrollment_count', DESCENDING), ('_id', DESCENDING)]),
+    ('get_courses (all, duration)', 'courses', {}, [('duration', DESCENDING), ('_id', DESCENDING)]),
+    ('get_courses (price range)', 'courses', {'is_published': True, 'price': {'$lte': 50}}, [('price', ASCENDING), ('_id', ASCENDING)]),
+    ('catalog version', 'courses', {}, [('updated_at', DESCENDING)]),
+    ('search (prefix)', 'courses', {'search_terms': {'$regex': '^pyth'}}, None),
+    ('get_course', 'courses', {'_id': ObjectId(_SAMPLE_ID)}, None),
+    ('get_enrollments (instructor courses)', 'courses', {'instructor_id': _SAMPLE_ID}, None),
+    ('get_lessons', 'lessons', {'course_id': _SAMPLE_ID}, [('order', ASCENDING), ('_id', ASCENDING)]),
+    ('lesson counts', 'lessons', {'course_id': {'$in': [_SAMPLE_ID]}}, None),
+    ('get_lesson (next lesson)', 'lessons', {'course_id': _SAMPLE_ID, 'order': {'$gt': 1}}, [('order', ASCENDING), ('_id', ASCENDING)]),
+    ('update_progress (lesson)', 'lessons', {'_id': ObjectId(_SAMPLE_ID), 'course_id': _SAMPLE_ID}, None),
+    ('get_enrollments (student)', 'enrollments', {'student_id': _SAMPLE_ID}, [('_id', ASCENDING)]),
+    ('get_enrollments (instructor)', 'enrollments', {'course_id': {'$in': [_SAMPLE_ID]}}, [('_id', ASCENDING)]),
+    ('enroll / update_progress', 'enrollments', {'student_id': _SAMPLE_ID, 'course_id': _SAMPLE_ID}, None)
+]
+
+def ensure_indexes(database=None):
+    """Create every registered index; existing ones are left untouched"""
+    database = database if database is not None else db
+    created = {}
+    for collection_name, indexes in INDEXES.items():
+        created[collection_name] = database[collection_name].create_indexes(indexes)
+    return created
+
+def _plan_stages(plan):
+    """Yield every stage name in an explain() plan tree"""
+    if isinstance(plan, dict):
+        if 'stage' in plan:
+            yield plan['stage']
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _plan_stages(item)
+
+def _index_prefix_covers(collection, query, sort):
+    """Fallback for servers without explain(): check an index leads with a queried or sorted field"""
+    fields = set(query) | {key for key, _ in (sort or [])}
+    if not fields or '_id' in fields:
+        return True
+    for info in collection.index_information().values():
+        leading_field = list(info['key'])[0][0]
+        if leading_field in fields:
+            return True
+    return False
+
+def audit_query_plans(database=None):
+    """Run explain() on every route query shape
+
+    Returns a list of (description, collection, problem) for shapes whose
+    winning plan contains a COLLSCAN. On servers without explain() support
+    (e.g. mongomock) the registered indexes are checked statically instead.
+    """
+    database = database if database is not None else db
+    problems = []
+    for description, collection_name, query, sort in QUERY_SHAPES:
+        collection = database[collection_name]
+        cursor = collection.find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+
+        if not hasattr(cursor, 'explain'):
+            if not _index_prefix_covers(collection, query, sort):
+                problems.append((description, collection_name, 'no index on queried fields'))
+            continue
+
+        plan = cursor.explain().get('queryPlanner', {}).get('winningPlan', {})
+        if 'COLLSCAN' in set(_plan_stages(plan)):
+            problems.append((description, collection_name, 'COLLSCAN'))
+
+    return problems
@@ -0,0 +1,57 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+from datetime import date, datetime, timezone
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC
+except ImportError:
+    orjson = None
+
+class BSONJSONProvider(DefaultJSONProvider):
+    """JSON provider that serializes ObjectId and datetime fields directly
+
+    Routes can return Mongo documents as-is. Uses orjson when it is installed
+    and falls back to the standard library encoder otherwise. Both encode
+    datetimes as ISO 8601 in UTC (Mongo stores naive UTC datetimes).
+    """
+
+    sort_keys = False
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, ObjectId):
+            return str(o)
+        if isinstance(o, datetime):
+            if o.tzinfo is None:
+                o = o.replace(tzinfo=timezone.utc)
+            return o.isoformat()
+        if isinstance(o, date):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS).decode('utf-8')
+            except (TypeError, orjson.JSONEncodeError):
+                pass
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if orjson is not None and not self._app.debug:
+            try:
+                body = orjson.dumps(obj, default=self.default, option=ORJSON_OPTIONS)
+                return self._app.response_class(body, mimetype=self.mimetype)
+            except (TypeError, orjson.JSONEncodeError):
+                pass
+        return super().response(obj)
@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from utils.database import courses_collection, lessons_collection
+
+# Courses carry lesson_count, kept current with $inc by the lesson routes
+# (see touch_course) so every worker computes progress from the same total.
+
+def get_lesson_counts(course_ids):
+    """Count lessons per course with one $group query instead of one count per course"""
+    if not course_ids:
+        return {}
+    
+    pipeline = [
+        {'$match': {'course_id': {'$in': list(course_ids)}}},
+        {'$group': {'_id': '$course_id', 'count': {'$sum': 1}}}
+    ]
+    return {row['_id']: row['count'] for row in lessons_collection.aggregate(pipeline)}
+
+def get_lesson_count(course_id):
+    """Get the number of lessons in a course from its lesson_count (counted for courses without one)"""
+    course = courses_collection.find_one({'_id': ObjectId(course_id)}, {'lesson_count': 1})
+    if course is None or course.get('lesson_count') is None:
+        return lessons_collection.count_documents({'course_id': course_id})
+    return course['lesson_count']
+
+def fill_missing_lesson_counts(batch_size=1000):
+    """Count lessons for courses that have no lesson_count yet; return how many were filled"""
+    missing = [str(course['_id']) for course in courses_collection.find({'lesson_count': None}, {'_id': 1})]
+
+    filled = 0
+    for start in range(0, len(missing), batch_size):
+        course_ids = missing[start:start + batch_size]
+        counts = get_lesson_counts(course_ids)
+        # Skip courses a lesson write's $inc has reached in the meantime
+        operations = [
+            UpdateOne({'_id': ObjectId(course_id), 'lesson_count': None},
+                      {'$set': {'lesson_count': counts.get(course_id, 0)}})
+            for course_id in course_ids
+        ]
+        filled += courses_collection.bulk_write(operations, ordered=False).modified_count
+    return filled
@@ -0,0 +1,314 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glob
+import json
+import time
+import bisect
+import logging
+import threading
+from flask import g, request, current_app, jsonify
+from pymongo import monitoring
+from config import Config
+from utils.auth import get_hash_pool_stats
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Caches reported on /metrics: name -> function returning their stats() dict.
+# Registered by the modules that own them (they import the database, this module must not).
+_caches = {}
+
+def register_cache(name, stats):
+    """Report a cache's hit/miss counters on /metrics"""
+    _caches[name] = stats
+
+class ProcessMetrics:
+    """Request and connection pool counters of one worker process
+
+    Recording only touches dicts under a lock; a background thread writes a
+    snapshot to METRICS_DIR every METRICS_FLUSH_SECONDS so whichever worker
+    serves /metrics can add up all of them, without requests paying for the
+    file write.
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.latency = {}
+        self.pool = {'open': 0, 'in_use': 0, 'waiting': 0, 'checkout_failed': 0}
+
+    def observe(self, labels, status, seconds):
+        """Count one request and add its duration to the route's histogram"""
+        with self.lock:
+            key = labels + (str(status),)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.latency.get(labels)
+            if histogram is None:
+                histogram = self.latency[labels] = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0]
+            histogram[0][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            histogram[1] += seconds
+
+    def change_pool(self, field, amount):
+        with self.lock:
+            self.pool[field] += amount
+
+    def snapshot(self):
+        """Everything this process reports, as a JSON-serializable dict"""
+        with self.lock:
+            snapshot = {
+                'pid': self.pid,
+                'requests': [list(key) + [count] for key, count in self.requests.items()],
+                'latency': [list(key) + [list(buckets), total] for key, (buckets, total) in self.latency.items()],
+                'pool': dict(self.pool)
+            }
+        snapshot['hash_pool'] = get_hash_pool_stats()
+        snapshot['caches'] = {name: stats() for name, stats in _caches.items()}
+        return snapshot
+
+    def flush(self):
+        """Write this process's snapshot to METRICS_DIR (atomically, via rename)"""
+        if not Config.METRICS_DIR:
+            return
+        os.makedirs(Config.METRICS_DIR, exist_ok=True)
+        path = os.path.join(Config.METRICS_DIR, f'metrics-{self.pid}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + '.tmp', path)
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(Config.METRICS_FLUSH_SECONDS)
+            try:
+                self.flush()
+            except OSError as e:
+                logger.warning(f'Could not write metrics snapshot: {e}')
+
+    def start_flusher(self):
+        """Start the daemon thread writing this process's snapshots"""
+        if Config.METRICS_DIR:
+            threading.Thread(target=self._flush_periodically, name='metrics-flush', daemon=True).start()
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_metrics():
+    """Return this process's ProcessMetrics
+
+    A forked worker starts from zero with its own flush thread (threads do
+    not survive fork, so the parent's would never run in the child).
+    """
+    global _metrics
+    if _metrics is None or _metrics.pid != os.getpid():
+        with _metrics_lock:
+            if _metrics is None or _metrics.pid != os.getpid():
+                _metrics = ProcessMetrics()
+                _metrics.start_flusher()
+    return _metrics
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Tracks open, checked out and waiting MongoDB connections of this process"""
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        get_metrics().change_pool('open', 1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        get_metrics().change_pool('open', -1)
+
+    def connection_check_out_started(self, event):
+        get_metrics().change_pool('waiting', 1)
+
+    def connection_check_out_failed(self, event):
+        metrics = get_metrics()
+        metrics.change_pool('waiting', -1)
+        metrics.change_pool('checkout_failed', 1)
+
+    def connection_checked_out(self, event):
+        metrics = get_metrics()
+        metrics.change_pool('waiting', -1)
+        metrics.change_pool('in_use', 1)
+
+    def connection_checked_in(self, event):
+        get_metrics().change_pool('in_use', -1)
+
+# Passed to every MongoClient (see utils/database.py)
+pool_listener = PoolMetricsListener()
+
+def clear_metrics_dir():
+    """Remove snapshots left in METRICS_DIR by a previous server run"""
+    for path in glob.glob(os.path.join(Config.METRICS_DIR, 'metrics-*.json*')):
+        os.remove(path)
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def load_snapshots():
+    """Snapshots of every process: this one fresh, the others from METRICS_DIR"""
+    current = get_metrics()
+    current.flush()
+    snapshots = [current.snapshot()]
+    if not Config.METRICS_DIR:
+        return snapshots
+
+    for path in glob.glob(os.path.join(Config.METRICS_DIR, 'metrics-*.json')):
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if snapshot['pid'] != current.pid:
+            snapshot['running'] = _is_running(snapshot['pid'])
+            snapshots.append(snapshot)
+    return snapshots
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+def render_metrics(snapshots):
+    """Prometheus text exposition of snapshots added up across processes
+
+    Counters include processes that have exited so they never go backwards;
+    gauges only count processes that are still running.
+    """
+    requests = {}
+    latency = {}
+    pool = {'open': 0, 'in_use': 0, 'waiting': 0, 'checkout_failed': 0}
+    hash_pool = {'pending': 0, 'rejected': 0}
+    caches = {}
+    processes = 0
+
+    for snapshot in snapshots:
+        running = snapshot.get('running', True)
+        processes += running
+        for *key, count in snapshot['requests']:
+            requests[tuple(key)] = requests.get(tuple(key), 0) + count
+        for blueprint, endpoint, method, buckets, total in snapshot['latency']:
+            histogram = latency.setdefault((blueprint, endpoint, method), [[0] * len(buckets), 0.0])
+            histogram[0] = [a + b for a, b in zip(histogram[0], buckets)]
+            histogram[1] += total
+        pool['checkout_failed'] += snapshot['pool']['checkout_failed']
+        hash_pool['rejected'] += snapshot['hash_pool']['rejected']
+        if running:
+            for field in ('open', 'in_use', 'waiting'):
+                pool[field] += snapshot['pool'][field]
+            hash_pool['pending'] += snapshot['hash_pool']['pending']
+        for name, stats in snapshot['caches'].items():
+            totals = caches.setdefault(name, {'hits': 0, 'misses': 0, 'size': 0, 'verified_reads': 0, 'stale_reads': 0})
+            for field in ('hits', 'misses', 'verified_reads', 'stale_reads'):
+                totals[field] += stats.get(field, 0)
+            if running:
+                totals['size'] += stats.get('size', 0)
+
+    lines = []
+    def metric(name, kind, description, samples):
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(f'{sample_name}{labels} {value}' for sample_name, labels, value in samples)
+
+    metric('lms_http_requests_total', 'counter', 'Requests handled, by route and status code', [
+        ('lms_http_requests_total', _labels(blueprint=blueprint, endpoint=endpoint, method=method, status=status), count)
+        for (blueprint, endpoint, method, status), count in sorted(requests.items())
+    ])
+
+    samples = []
+    for (blueprint, endpoint, method), (buckets, total) in sorted(latency.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), buckets):
+            cumulative += count
+            samples.append(('lms_http_request_duration_seconds_bucket',
+                            _labels(blueprint=blueprint, endpoint=endpoint, method=method, le=bound), cumulative))
+        labels = _labels(blueprint=blueprint, endpoint=endpoint, method=method)
+        samples.append(('lms_http_request_duration_seconds_sum', labels, round(total, 6)))
+        samples.append(('lms_http_request_duration_seconds_count', labels, cumulative))
+    metric('lms_http_request_duration_seconds', 'histogram', 'Request latency, by route', samples)
+
+    metric('lms_mongo_pool_connections', 'gauge', 'MongoDB connections of running workers, by state', [
+        ('lms_mongo_pool_connections', _labels(state=state), pool[state]) for state in ('open', 'in_use')
+    ])
+    metric('lms_mongo_pool_waiting', 'gauge', 'Operations waiting for a MongoDB connection',
+           [('lms_mongo_pool_waiting', '', pool['waiting'])])
+    metric('lms_mongo_pool_checkout_failures_total', 'counter', 'MongoDB connection checkouts that failed or timed out',
+           [('lms_mongo_pool_checkout_failures_total', '', pool['checkout_failed'])])
+
+    metric('lms_hash_queue_depth', 'gauge', 'Password hashes queued or running on the bcrypt pools',
+           [('lms_hash_queue_depth', '', hash_pool['pending'])])
+    metric('lms_hash_rejected_total', 'counter', 'Password hashes rejected because the bcrypt queue was full',
+           [('lms_hash_rejected_total', '', hash_pool['rejected'])])
+
+    metric('lms_cache_hits_total', 'counter', 'Cache hits',
+           [('lms_cache_hits_total', _labels(cache=name), totals['hits']) for name, totals in sorted(caches.items())])
+    metric('lms_cache_misses_total', 'counter', 'Cache misses',
+           [('lms_cache_misses_total', _labels(cache=name), totals['misses']) for name, totals in sorted(caches.items())])
+    metric('lms_cache_hit_ratio', 'gauge', 'Cache hits / lookups since the workers started', [
+        ('lms_cache_hit_ratio', _labels(cache=name),
+         round(totals['hits'] / (totals['hits'] + totals['misses']), 4) if totals['hits'] + totals['misses'] else 0.0)
+        for name, totals in sorted(caches.items())
+    ])
+    metric('lms_cache_entries', 'gauge', 'Entries held by in-process caches of running workers',
+           [('lms_cache_entries', _labels(cache=name), totals['size']) for name, totals in sorted(caches.items())])
+    metric('lms_cache_stale_reads_total', 'counter', 'Sampled cache hits found stale against MongoDB', [
+        ('lms_cache_stale_reads_total', _labels(cache=name), totals['stale_reads'])
+        for name, totals in sorted(caches.items()) if totals['verified_reads']
+    ])
+
+    metric('lms_worker_processes', 'gauge', 'Worker processes reporting metrics',
+           [('lms_worker_processes', '', processes)])
+    return '\n'.join(lines) + '\n'
+
+def start_request_timer():
+    """before_request hook: note when the request started"""
+    g.metrics_started_at = time.perf_counter()
+
+def record_request(response):
+    """after_request hook: count the request and its latency under its route"""
+    started_at = g.get('metrics_started_at')
+    if started_at is None:
+        return response
+
+    labels = (request.blueprint or '', request.endpoint or 'unmatched', request.method)
+    get_metrics().observe(labels, response.status_code, time.perf_counter() - started_at)
+    return response
+
+def metrics_endpoint():
+    """Prometheus metrics of all workers (bearer METRICS_TOKEN required; open without one only in debug)"""
+    if not Config.METRICS_TOKEN:
+        if not current_app.debug:
+            return jsonify({'message': 'Set METRICS_TOKEN to serve metrics'}), 403
+    elif request.headers.get('Authorization') != f'Bearer {Config.METRICS_TOKEN}':
+        return jsonify({'message': 'Metrics token is missing or invalid'}), 401
+
+    body = render_metrics(load_snapshots())
+    return current_app.response_class(body, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def init_metrics(app):
+    """Record per-route request metrics on app and serve them on /metrics"""
+    app.before_request(start_request_timer)
+    app.after_request(record_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_endpoint)
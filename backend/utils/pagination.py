@@ -0,0 +1,104 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import base64
+from flask import request
+from bson import ObjectId
+from bson.errors import InvalidId
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(values):
+    """Encode the sort key values of the last document into an opaque cursor"""
+    values = [str(value) if isinstance(value, ObjectId) else value for value in values]
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor, sort_keys):
+    """Decode an opaque cursor back into sort key values"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(sort_keys):
+            raise ValueError
+        return [ObjectId(value) if key == '_id' else value for key, value in zip(sort_keys, values)]
+    except (ValueError, TypeError, InvalidId):
+        raise ValueError('Invalid cursor')
+
+def get_page_params():
+    """Read ?limit= and ?cursor= from the request
+
+    Returns (limit, cursor). limit is None when the caller asked for neither,
+    in which case the full result is returned as before.
+    """
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+
+    if limit is None:
+        return (DEFAULT_PAGE_SIZE if cursor else None), cursor
+
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+
+    if limit < 1:
+        raise ValueError('limit must be positive')
+
+    return min(limit, MAX_PAGE_SIZE), cursor
+
+def has_page_params():
+    """Check whether the request asked for a page"""
+    return 'limit' in request.args or 'cursor' in request.args
+
+def keyset_filter(sort_keys, values, operator='$gt'):
+    """Build a filter matching documents strictly after values in (sort_keys) order
+
+    Use operator='$lt' to match documents strictly before values instead.
+    """
+    clauses = []
+    for i, key in enumerate(sort_keys):
+        clause = {k: v for k, v in zip(sort_keys[:i], values[:i])}
+        clause[key] = {operator: values[i]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {'$or': clauses}
+
+def paginate(collection, query, sort_keys=('_id',), projection=None, direction=1):
+    """Run a keyset-paginated find on collection, sorted by sort_keys in direction (1 or -1)
+
+    Returns (documents, next_cursor). next_cursor is None on the last page.
+    """
+    sort_keys = list(sort_keys)
+    limit, cursor = get_page_params()
+
+    # Inclusion projections must keep the sort keys to build the next cursor;
+    # sort keys an exclusion projection hides are fetched and removed afterwards
+    hidden_keys = []
+    if projection and any(projection.values()):
+        projection = dict(projection, **{key: 1 for key in sort_keys})
+    elif projection:
+        hidden_keys = [key for key in sort_keys if key in projection]
+        projection = {key: value for key, value in projection.items() if key not in hidden_keys} or None
+
+    if cursor:
+        after = keyset_filter(sort_keys, decode_cursor(cursor, sort_keys), '$gt' if direction == 1 else '$lt')
+        query = {'$and': [query, after]} if query else after
+
+    results = collection.find(query, projection).sort([(key, direction) for key in sort_keys])
+
+    next_cursor = None
+    if limit is None:
+        documents = list(results)
+    else:
+        # Fetch one extra document to know whether another page exists
+        documents = list(results.limit(limit + 1))
+        if len(documents) > limit:
+            documents = documents[:limit]
+            next_cursor = encode_cursor([documents[-1].get(key) for key in sort_keys])
+
+    for document in documents:
+        for key in hidden_keys:
+            document.pop(key, None)
+    return documents, next_cursor
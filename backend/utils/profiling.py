@@ -0,0 +1,202 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import glob
+import json
+import time
+import random
+import cProfile
+import threading
+from collections import Counter
+from datetime import datetime
+from flask import g, request, current_app
+from config import Config
+from middleware.auth_middleware import role_required
+
+try:
+    from gevent import monkey as gevent_monkey
+except ImportError:
+    gevent_monkey = None
+
+# Admin requests carrying this header are profiled; its value may pick the mode
+PROFILE_HEADER = 'X-Profile'
+PROFILE_MODES = ('cprofile', 'sample')
+
+class CProfileCapture:
+    """Deterministic profile of every Python call (written as a .pstats file)"""
+
+    extension = '.pstats'
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def write(self, path):
+        self.profile.dump_stats(path)
+
+class StackSampler:
+    """Statistical profile of the request thread, sampled from a background thread
+
+    Cheaper than cProfile on call-heavy code. Written as collapsed stacks
+    ('outer;inner count' lines) for flamegraph.pl, speedscope or inferno.
+    Needs real OS threads: see sampling_supported().
+    """
+
+    extension = '.folded'
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+
+# One capture at a time per process: bounds the overhead, and cProfile
+# cannot run two profilers at once on newer Pythons
+_capture_lock = threading.Lock()
+
+def sampling_supported():
+    """False under gevent workers
+
+    With threading monkey-patched the sampler runs as a greenlet that only
+    gets scheduled while the request is blocked on I/O, and
+    sys._current_frames() does not see greenlet stacks, so its captures
+    would come out empty.
+    """
+    return gevent_monkey is None or not gevent_monkey.is_module_patched('threading')
+
+def _is_admin():
+    """True if the request carries a valid Admin token, as checked by role_required"""
+    return role_required('Admin')(lambda: True)() is True
+
+def _requested_capture():
+    """Return (mode, trigger) if this request should be profiled, else None"""
+    header = request.headers.get(PROFILE_HEADER)
+    if header is not None:
+        if not _is_admin():
+            return None
+        return (header if header in PROFILE_MODES else Config.PROFILE_MODE), 'header'
+
+    if Config.PROFILE_SAMPLE_RATE > 0 and random.random() < Config.PROFILE_SAMPLE_RATE:
+        if not Config.PROFILE_ENDPOINTS or request.endpoint in Config.PROFILE_ENDPOINTS:
+            return Config.PROFILE_MODE, 'sample'
+    return None
+
+def start_profile():
+    """before_request hook: start profiling the request if it was selected"""
+    requested = _requested_capture()
+    if requested is None or not _capture_lock.acquire(blocking=False):
+        return
+
+    mode, trigger = requested
+    if mode == 'sample' and not sampling_supported():
+        mode = 'cprofile'
+    capture = StackSampler(Config.PROFILE_SAMPLE_INTERVAL_MS / 1000) if mode == 'sample' else CProfileCapture()
+    g.profile = (capture, mode, trigger, time.perf_counter())
+    capture.start()
+
+def _prune(directory):
+    """Keep only the newest PROFILE_KEEP captures of a route"""
+    meta_paths = sorted(glob.glob(os.path.join(directory, '*.json')))
+    for meta_path in meta_paths[:max(0, len(meta_paths) - Config.PROFILE_KEEP)]:
+        with open(meta_path) as f:
+            data_file = json.load(f)['file']
+        for path in (meta_path, os.path.join(Config.PROFILE_DIR, data_file)):
+            if os.path.exists(path):
+                os.remove(path)
+
+def save_capture(capture, mode, trigger, duration_ms, status):
+    """Write a capture and its metadata under PROFILE_DIR/<endpoint>/; return its file name"""
+    endpoint = request.endpoint or 'unmatched'
+    directory = os.path.join(Config.PROFILE_DIR, endpoint)
+    os.makedirs(directory, exist_ok=True)
+
+    name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{os.getpid()}"
+    capture.write(os.path.join(directory, name + capture.extension))
+    meta = {
+        'endpoint': endpoint,
+        'method': request.method,
+        'path': request.path,
+        'status': status,
+        'duration_ms': round(duration_ms, 2),
+        'mode': mode,
+        'trigger': trigger,
+        'captured_at': datetime.utcnow().isoformat(),
+        'file': f'{endpoint}/{name}{capture.extension}'
+    }
+    with open(os.path.join(directory, name + '.json'), 'w') as f:
+        json.dump(meta, f)
+
+    _prune(directory)
+    return meta['file']
+
+def finish_profile(response):
+    """after_request hook: stop the request's profiler and save the capture"""
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+
+    capture, mode, trigger, started_at = profile
+    try:
+        capture.stop()
+        duration_ms = (time.perf_counter() - started_at) * 1000
+        response.headers['X-Profile-Capture'] = save_capture(capture, mode, trigger, duration_ms, response.status_code)
+    except OSError as e:
+        current_app.logger.warning(f'Could not save profile of {request.path}: {e}')
+    finally:
+        _capture_lock.release()
+    return response
+
+def abandon_profile(error=None):
+    """teardown hook: stop a profiler whose request never reached after_request"""
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile[0].stop()
+        _capture_lock.release()
+
+def list_captures(endpoint=None, limit=50):
+    """Metadata of the newest captures (of one endpoint, or all), newest first"""
+    pattern = os.path.join(Config.PROFILE_DIR, os.path.basename(endpoint) if endpoint else '*', '*.json')
+    captures = []
+    for path in sorted(glob.glob(pattern), key=os.path.basename, reverse=True)[:limit]:
+        try:
+            with open(path) as f:
+                captures.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return captures
+
+def init_profiling(app):
+    """Profile requests selected by header (Admin only) or PROFILE_SAMPLE_RATE on app"""
+    app.before_request(start_profile)
+    app.after_request(finish_profile)
+    app.teardown_request(abandon_profile)
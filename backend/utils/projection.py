@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import request
+
+# Lesson fields clients may write, and every field ?fields= may select
+LESSON_UPDATE_FIELDS = ('title', 'content', 'lesson_type', 'video_url', 'order', 'duration')
+LESSON_FIELDS = ('course_id', 'created_at', 'updated_at') + LESSON_UPDATE_FIELDS
+# Heavy fields left out of ?view=summary responses
+LESSON_SUMMARY_EXCLUDE = ('content',)
+
+def get_projection(allowed_fields, summary_exclude=()):
+    """Build a Mongo projection from ?fields= or ?view=summary
+
+    ?fields=a,b returns only those fields (plus _id); ?view=summary drops the
+    summary_exclude fields. Returns None when neither is given.
+    """
+    fields = request.args.get('fields')
+    view = request.args.get('view')
+
+    if fields:
+        names = [name.strip() for name in fields.split(',') if name.strip()]
+        unknown = [name for name in names if name not in allowed_fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return {name: 1 for name in names}
+
+    if view == 'summary':
+        return {name: 0 for name in summary_exclude}
+
+    if view not in (None, 'full'):
+        raise ValueError('view must be summary or full')
+
+    return None
+
+def apply_projection(document, projection):
+    """Apply a projection from get_projection to an already fetched document"""
+    if not projection:
+        return document
+
+    if any(projection.values()):
+        return {key: value for key, value in document.items() if key == '_id' or key in projection}
+
+    return {key: value for key, value in document.items() if key not in projection}
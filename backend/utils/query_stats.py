@@ -0,0 +1,144 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+from collections import Counter
+from flask import g, request, current_app, has_request_context
+from pymongo import monitoring
+from config import Config
+
+# Commands that read or write documents -> the field holding their filter
+DATA_COMMANDS = {
+    'find': 'filter',
+    'aggregate': 'pipeline',
+    'count': 'query',
+    'distinct': 'query',
+    'findAndModify': 'query',
+    'update': 'updates',
+    'delete': 'deletes',
+    'insert': None
+}
+
+class RepeatedQueryError(AssertionError):
+    """Raised (when strict or testing) if one query shape repeats too often in a request"""
+
+class RequestQueryStats:
+    """Mongo commands issued while handling one request"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.count = 0
+        self.duration_ms = 0.0
+        self.collections = Counter()
+        self.collection_ms = Counter()
+        self.shapes = Counter()
+        self.pending = {}
+        self.allow_repeats = False
+
+def _shape(value):
+    """Structure of a filter or pipeline with every literal value replaced by '?'"""
+    if isinstance(value, dict):
+        return '{' + ', '.join(f'{key}: {_shape(item)}' for key, item in value.items()) + '}'
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return '[' + ', '.join(_shape(item) for item in value) + ']'
+        return '[?]'
+    return '?'
+
+def query_shape(command_name, command):
+    """Describe a command as 'name collection filter-shape', ignoring literal values"""
+    field = DATA_COMMANDS[command_name]
+    body = command.get(field) if field else None
+    if command_name in ('update', 'delete') and body:
+        body = body[0].get('q')
+    return f'{command_name} {command.get(command_name)} {_shape(body)}'
+
+class RequestCommandListener(monitoring.CommandListener):
+    """Records the data commands of each Flask request on flask.g
+
+    pymongo publishes command events on the thread that runs the command,
+    so the request context of the route issuing it is active here.
+    """
+
+    def started(self, event):
+        if event.command_name not in DATA_COMMANDS or not has_request_context():
+            return
+        stats = g.get('query_stats')
+        if stats is None:
+            return
+        collection = event.command.get(event.command_name)
+        stats.count += 1
+        stats.collections[collection] += 1
+        stats.shapes[query_shape(event.command_name, event.command)] += 1
+        stats.pending[event.request_id] = collection
+
+    def _finished(self, event):
+        if event.command_name not in DATA_COMMANDS or not has_request_context():
+            return
+        stats = g.get('query_stats')
+        if stats is None or event.request_id not in stats.pending:
+            return
+        duration_ms = event.duration_micros / 1000
+        stats.duration_ms += duration_ms
+        stats.collection_ms[stats.pending.pop(event.request_id)] += duration_ms
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event)
+
+# Passed to every MongoClient (see utils/database.py)
+command_listener = RequestCommandListener()
+
+def get_query_stats():
+    """Return the current request's RequestQueryStats, or None outside a request"""
+    return g.get('query_stats') if has_request_context() else None
+
+def allow_repeated_queries():
+    """Exempt the current request from the repeated query check (e.g. batch jobs)"""
+    stats = get_query_stats()
+    if stats is not None:
+        stats.allow_repeats = True
+
+def start_query_stats():
+    """before_request hook: start recording the request's Mongo commands"""
+    g.query_stats = RequestQueryStats()
+
+def check_repeated_queries(stats):
+    """Warn about query shapes run more than QUERY_REPEAT_THRESHOLD times (a likely N+1)
+
+    Raises RepeatedQueryError instead when QUERY_REPEAT_STRICT is set or the app is testing.
+    """
+    if stats.allow_repeats:
+        return
+    for shape, count in stats.shapes.items():
+        if count > Config.QUERY_REPEAT_THRESHOLD:
+            message = f'{request.method} {request.path} ran "{shape}" {count} times (possible N+1 query)'
+            if Config.QUERY_REPEAT_STRICT or current_app.testing:
+                raise RepeatedQueryError(message)
+            current_app.logger.warning(message)
+
+def add_server_timing(response):
+    """after_request hook: add a Server-Timing header and check for repeated queries"""
+    stats = g.get('query_stats')
+    if stats is None:
+        return response
+
+    total_ms = (time.perf_counter() - stats.started_at) * 1000
+    response.headers['Server-Timing'] = (
+        f'db;dur={stats.duration_ms:.2f};desc="{stats.count} queries", app;dur={total_ms:.2f}'
+    )
+    current_app.logger.debug(
+        '%s %s: %d queries, %.2f ms in Mongo (%s)', request.method, request.path, stats.count,
+        stats.duration_ms, ', '.join(f'{name}={count}' for name, count in stats.collections.items())
+    )
+
+    check_repeated_queries(stats)
+    return response
+
+def init_query_stats(app):
+    """Record Mongo commands per request on app"""
+    app.before_request(start_query_stats)
+    app.after_request(add_server_timing)
@@ -0,0 +1,61 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import re
+from pymongo import UpdateOne
+from utils.database import courses_collection
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Fields whose words can be completed by prefix search
+SEARCH_TERM_FIELDS = ('title', 'category')
+# Internal course fields left out of API responses. enrollment_count only
+# orders ?sort=popular: enrollments do not bump updated_at, so a count in
+# course and catalog responses would go stale behind unchanged ETags.
+# Pass drivers a copy: some (mongomock among them) add keys to projection
+# dicts in place.
+HIDDEN_COURSE_FIELDS = {'search_terms': 0, 'enrollment_count': 0}
+# Fields covered by the ranked text index, with their weights
+TEXT_INDEX_WEIGHTS = {'title': 10, 'category': 5, 'description': 1}
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+def get_search_terms(course):
+    """Distinct lowercase words of a course's title and category, for prefix matching"""
+    terms = set()
+    for field in SEARCH_TERM_FIELDS:
+        terms.update(tokenize(course.get(field)))
+    return sorted(terms)
+
+def update_search_terms(course):
+    """Store freshly computed search_terms on a course document"""
+    courses_collection.update_one(
+        {'_id': course['_id']},
+        {'$set': {'search_terms': get_search_terms(course)}}
+    )
+
+def backfill_search_terms(batch_size=1000):
+    """Compute search_terms for courses created before prefix search existed"""
+    projection = {field: 1 for field in SEARCH_TERM_FIELDS}
+    cursor = courses_collection.find({'search_terms': {'$exists': False}}, projection).batch_size(batch_size)
+    
+    updated = 0
+    operations = []
+    for course in cursor:
+        operations.append(UpdateOne({'_id': course['_id']}, {'$set': {'search_terms': get_search_terms(course)}}))
+        if len(operations) >= batch_size:
+            updated += courses_collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        updated += courses_collection.bulk_write(operations, ordered=False).modified_count
+    return updated
+
+def build_prefix_query(text):
+    """Match courses having, for every word of text, a search term starting with it"""
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    return {'$and': [{'search_terms': {'$regex': '^' + re.escape(token)}} for token in tokens]}
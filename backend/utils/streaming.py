@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io
+import csv
+from datetime import datetime, timezone
+from flask import request, current_app, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+def get_stream_format():
+    """Return 'ndjson', 'json' or None depending on Accept and ?stream="""
+    if request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE:
+        return 'ndjson'
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return 'json'
+    return None
+
+def iter_batches(cursor, batch_size):
+    """Group a pymongo cursor into lists of at most batch_size documents"""
+    batch = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def stream_documents(batches, key, stream_format):
+    """Stream batches of documents as {key: [...]} JSON or as NDJSON
+
+    Only one batch is held in memory at a time, so memory use is independent
+    of the result size.
+    """
+    dumps = current_app.json.dumps
+
+    def generate_ndjson():
+        for batch in batches:
+            yield ''.join(dumps(document) + '\n' for document in batch)
+
+    def generate_json():
+        yield '{"%s":[' % key
+        separator = ''
+        for batch in batches:
+            if batch:
+                yield separator + ','.join(dumps(document) for document in batch)
+                separator = ','
+        yield ']}'
+
+    if stream_format == 'ndjson':
+        return current_app.response_class(stream_with_context(generate_ndjson()), mimetype=NDJSON_MIMETYPE)
+    return current_app.response_class(stream_with_context(generate_json()), mimetype='application/json')
+
+def stream_csv(batches, columns, filename):
+    """Stream batches of row dicts as a CSV attachment, one batch at a time"""
+    def format_value(value):
+        if isinstance(value, datetime):
+            # Same ISO 8601 UTC format as the JSON responses
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            return value.isoformat()
+        return '' if value is None else value
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for batch in batches:
+            for row in batch:
+                writer.writerow([format_value(row.get(column)) for column in columns])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    response = current_app.response_class(stream_with_context(generate()), mimetype='text/csv')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
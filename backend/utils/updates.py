@@ -0,0 +1,18 @@
+from datetime import datetime
+from pymongo import ReturnDocument
+
+def update_fields(collection, query, data, fields, projection=None):
+    """Apply a partial update from request data in one round trip
+
+    Only the keys of fields that are present in data are written, along with
+    updated_at. Returns the updated document, or None if nothing matched query.
+    """
+    update_data = {field: data[field] for field in fields if field in data}
+    update_data['updated_at'] = datetime.utcnow()
+    
+    return collection.find_one_and_update(
+        query,
+        {'$set': update_data},
+        projection=projection,
+        return_document=ReturnDocument.AFTER
+    )
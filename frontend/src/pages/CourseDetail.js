@@ -15,7 +15,7 @@ const CourseDetail = () => {
 
   const fetchCourseData = useCallback(async () => {
     try {
-      const response = await api.get(`/api/courses/${id}`);
+      const response = await api.get(`/api/courses/${id}?view=summary`);
       setCourse(response.data.course);
       setLessons(response.data.course.lessons || []);
     } catch (error) {
@@ -15,70 +15,38 @@ const LessonViewer = () => {
 
   const fetchLessonData = useCallback(async () => {
     try {
-      // Get lesson from course
-      const coursesResponse = await api.get('/api/courses');
-      let foundLesson = null;
-      let foundCourse = null;
-
-      for (const course of coursesResponse.data.courses) {
-        const courseDetail = await api.get(`/api/courses/${course._id}`);
-        const lesson = courseDetail.data.course.lessons?.find(
-          (l) => l._id === id
-        );
-        if (lesson) {
-          foundLesson = lesson;
-          foundCourse = courseDetail.data.course;
-          break;
-        }
-      }
-
-      if (!foundLesson) {
+      // Lesson, course summary and enrollment progress in one request
+      const response = await api.get(`/api/lessons/${id}`);
+      setLesson(response.data.lesson);
+      setCourse(response.data.course);
+      setEnrollment(response.data.enrollment);
+    } catch (error) {
+      if (error.response?.status === 404) {
         setError('Lesson not found');
-        return;
+      } else {
+        setError('Failed to fetch lesson');
       }
-
-      setLesson(foundLesson);
-      setCourse(foundCourse);
-    } catch (error) {
-      setError('Failed to fetch lesson');
       console.error('Error fetching lesson:', error);
     } finally {
       setLoading(false);
     }
   }, [id]);
 
-  const checkEnrollment = useCallback(async () => {
-    try {
-      const response = await api.get('/api/enrollments');
-      if (course) {
-        const enrollment = response.data.enrollments.find(
-          (e) => e.course_id === course._id
-        );
-        setEnrollment(enrollment);
-      }
-    } catch (error) {
-      console.error('Error checking enrollment:', error);
-    }
-  }, [course]);
-
   useEffect(() => {
     fetchLessonData();
-    if (isStudent) {
-      checkEnrollment();
-    }
-  }, [id, isStudent, fetchLessonData, checkEnrollment]);
+  }, [id, fetchLessonData]);
 
   const handleComplete = async () => {
     if (!course || !enrollment) return;
 
     try {
       const isCompleted = enrollment.completed_lessons?.includes(id);
-      await api.put('/api/progress', {
+      const response = await api.put('/api/progress', {
         course_id: course._id,
         lesson_id: id,
         completed: !isCompleted,
       });
-      await checkEnrollment();
+      setEnrollment(response.data.enrollment);
     } catch (error) {
       alert(error.response?.data?.message || 'Failed to update progress');
     }